@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.health_poller import HealthPoller
+
+
+class Command(BaseCommand):
+    help = "Poll the local connector of every saved connection and record its health."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Check whatever is due once and exit.")
+
+    def handle(self, *args, **options):
+        poller = HealthPoller()
+        if options["once"]:
+            checked = poller.run_once()
+            self.stdout.write(self.style.SUCCESS(f"Checked {checked} connector(s)."))
+            return
+        self.stdout.write("Polling connectors, Ctrl+C to stop.")
+        try:
+            poller.run_forever()
+        except KeyboardInterrupt:
+            pass
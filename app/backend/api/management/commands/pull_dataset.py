@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import DataSourceConnection
+from api.utils.monitoring import pull_from_connector
+
+
+class Command(BaseCommand):
+    help = "Pull a query result through a connection's local connector and record it as a monitoring snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("connector_id", help="Connection to pull through.")
+        parser.add_argument("dataset", help="Name the snapshot is recorded under.")
+        parser.add_argument("query", help="SELECT statement producing the dataset.")
+
+    def handle(self, *args, **options):
+        try:
+            connection = DataSourceConnection.objects.get(connector_id=options["connector_id"])
+        except DataSourceConnection.DoesNotExist:
+            raise CommandError(f"No connection {options['connector_id']}")
+        try:
+            snapshot = pull_from_connector(connection, options["dataset"], options["query"])
+        except Exception as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Recorded {snapshot.row_count} row(s) of {options['dataset']}, drift score {snapshot.drift_score}."
+        ))
@@ -0,0 +1,62 @@
+from cryptography.fernet import InvalidToken
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import DataSourceConnection
+from api.utils.crypto import is_current, rotate_text
+
+ENCRYPTED_FIELDS = ("_password", "_api_token")
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt stored connection secrets with the newest key in FERNET_KEYS. "
+        "Runs in short per-batch transactions, so it can run while the app is live; "
+        "drop the old key only after it finishes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would change without writing.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        rotated = failed = scanned = 0
+        last_pk = None
+        while True:
+            # Keyset batches on the primary key: each transaction locks only its own rows
+            with transaction.atomic():
+                rows = DataSourceConnection.objects.select_for_update().order_by("pk").only("pk", *ENCRYPTED_FIELDS)
+                if last_pk is not None:
+                    rows = rows.filter(pk__gt=last_pk)
+                batch = list(rows[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                scanned += len(batch)
+
+                changed = []
+                for connection in batch:
+                    dirty = False
+                    for field in ENCRYPTED_FIELDS:
+                        value = getattr(connection, field)
+                        if not value or is_current(value):
+                            continue
+                        try:
+                            setattr(connection, field, rotate_text(value))
+                        except InvalidToken:
+                            failed += 1
+                            self.stderr.write(f"{connection.pk}.{field}: no configured key can decrypt it")
+                            continue
+                        dirty = True
+                    if dirty:
+                        changed.append(connection)
+                # bulk_update leaves updated_at alone: rotating keys is not a user-visible change
+                if changed and not options["dry_run"]:
+                    DataSourceConnection.objects.bulk_update(changed, ENCRYPTED_FIELDS, batch_size=batch_size)
+                rotated += len(changed)
+
+        verb = "Would re-encrypt" if options["dry_run"] else "Re-encrypted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {rotated} of {scanned} connection(s)."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} value(s) could not be decrypted and were left as is."))
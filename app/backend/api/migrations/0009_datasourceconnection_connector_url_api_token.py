@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_remove_datasourceconnection_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasourceconnection',
+            name='_api_token',
+            field=models.TextField(blank=True, db_column='api_token', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasourceconnection',
+            name='connector_url',
+            field=models.URLField(blank=True, max_length=255, null=True),
+        ),
+    ]
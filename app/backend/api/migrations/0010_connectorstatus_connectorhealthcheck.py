@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_datasourceconnection_connector_url_api_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectorStatus',
+            fields=[
+                ('connection', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='health', serialize=False, to='api.datasourceconnection')),
+                ('status', models.CharField(max_length=16)),
+                ('http_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('latency_ms', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('consecutive_failures', models.PositiveIntegerField(default=0)),
+                ('checked_at', models.DateTimeField()),
+                ('next_check_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ConnectorHealthCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=16)),
+                ('latency_ms', models.FloatField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField()),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='health_checks', to='api.datasourceconnection')),
+            ],
+            options={
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['connection', '-checked_at'], name='api_health_conn_checked_idx')],
+            },
+        ),
+    ]
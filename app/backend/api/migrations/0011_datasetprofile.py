@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_connectorstatus_connectorhealthcheck'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blob_name', models.CharField(max_length=1024, unique=True)),
+                ('file_format', models.CharField(max_length=16)),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('generation', models.BigIntegerField(blank=True, null=True)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('row_count', models.BigIntegerField(blank=True, null=True)),
+                ('columns', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('profiled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_datasetprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetMonitor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=1024, unique=True)),
+                ('state', models.JSONField(blank=True, default=dict)),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('snapshot_count', models.PositiveIntegerField(default=0)),
+                ('last_arrival_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DatasetSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=16)),
+                ('version', models.CharField(blank=True, default='', max_length=64)),
+                ('row_count', models.BigIntegerField()),
+                ('state', models.JSONField(blank=True, default=dict)),
+                ('completeness', models.FloatField(blank=True, null=True)),
+                ('drift', models.JSONField(blank=True, default=dict)),
+                ('drift_score', models.FloatField(blank=True, null=True)),
+                ('arrived_at', models.DateTimeField()),
+                ('monitor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='api.datasetmonitor')),
+            ],
+            options={
+                'ordering': ['-arrived_at'],
+                'indexes': [models.Index(fields=['monitor', '-arrived_at'], name='api_snapshot_monitor_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_datasetmonitor_datasetsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='datasourceconnection',
+            index=models.Index(fields=['user', '-updated_at'], name='api_conn_user_updated_idx'),
+        ),
+    ]
@@ -67,12 +67,20 @@ class DataSourceConnection(models.Model):
     _password = models.TextField(db_column='password', blank=True, null=True)
     database = models.CharField(max_length=128, blank=True, null=True)
 
+    # Local connector serving this source, used for health checks
+    connector_url = models.URLField(max_length=255, blank=True, null=True)
+    _api_token = models.TextField(db_column='api_token', blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "connector_id", "host", "port", "username", "database")
         ordering = ["-updated_at"]
+        indexes = [
+            # Serves the per-user listing in its default order
+            models.Index(fields=["user", "-updated_at"], name="api_conn_user_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.connector_id} ({self.host}:{self.port}) - {self.user.email}"
@@ -81,6 +89,8 @@ class DataSourceConnection(models.Model):
     def save(self, *args, **kwargs):
         if self._password and not self._password.startswith("gAAAA"):
             self._password = encrypt_text(self._password)
+        if self._api_token and not self._api_token.startswith("gAAAA"):
+            self._api_token = encrypt_text(self._api_token)
         super().save(*args, **kwargs)
 
     # Decrypt when accessed
@@ -93,4 +103,112 @@ class DataSourceConnection(models.Model):
 
     @password.setter
     def password(self, value):
-        self._password = encrypt_text(value) if value else None
\ No newline at end of file
+        self._password = encrypt_text(value) if value else None
+
+    @property
+    def api_token(self):
+        try:
+            return decrypt_text(self._api_token)
+        except Exception:
+            return None
+
+    @api_token.setter
+    def api_token(self, value):
+        self._api_token = encrypt_text(value) if value else None
+
+
+class ConnectorStatus(models.Model):
+    """
+    Latest health of a connection's local connector, written by the
+    poll_connectors command so status pages never wait on a live check.
+    """
+    connection = models.OneToOneField(
+        DataSourceConnection, on_delete=models.CASCADE, primary_key=True, related_name="health"
+    )
+    status = models.CharField(max_length=16)
+    http_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    latency_ms = models.FloatField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    checked_at = models.DateTimeField()
+    next_check_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.connection_id}: {self.status}"
+
+
+class ConnectorHealthCheck(models.Model):
+    """One poll result, kept for history and uptime."""
+    connection = models.ForeignKey(DataSourceConnection, on_delete=models.CASCADE, related_name="health_checks")
+    status = models.CharField(max_length=16)
+    latency_ms = models.FloatField(blank=True, null=True)
+    checked_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-checked_at"]
+        indexes = [models.Index(fields=["connection", "-checked_at"], name="api_health_conn_checked_idx")]
+
+
+class DatasetProfile(models.Model):
+    """Column statistics for an uploaded dataset, computed in the background after upload."""
+    blob_name = models.CharField(max_length=1024, unique=True)
+    file_format = models.CharField(max_length=16)
+    status = models.CharField(max_length=16, default="pending")  # pending, running, done, failed
+    generation = models.BigIntegerField(blank=True, null=True)
+    size = models.BigIntegerField(blank=True, null=True)
+    row_count = models.BigIntegerField(blank=True, null=True)
+    columns = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    profiled_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.blob_name} ({self.status})"
+
+
+class DatasetAccess(models.Model):
+    """A user's access to a dataset, granted when they upload it or pull it through one of their connections."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="dataset_access")
+    dataset = models.CharField(max_length=1024)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "dataset")
+
+    def __str__(self):
+        return f"{self.dataset} ({self.user_id})"
+
+
+class DatasetMonitor(models.Model):
+    """
+    Running column summaries of a dataset across every batch seen so far.
+    The summaries are mergeable sketches, so each new upload or connector
+    pull is folded in without rescanning earlier data.
+    """
+    dataset = models.CharField(max_length=1024, unique=True)
+    state = models.JSONField(default=dict, blank=True)
+    row_count = models.BigIntegerField(default=0)
+    snapshot_count = models.PositiveIntegerField(default=0)
+    last_arrival_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.dataset
+
+
+class DatasetSnapshot(models.Model):
+    """One arriving batch of a dataset, with its completeness and drift against the batch before it."""
+    monitor = models.ForeignKey(DatasetMonitor, on_delete=models.CASCADE, related_name="snapshots")
+    source = models.CharField(max_length=16)  # upload or connector
+    version = models.CharField(max_length=64, blank=True, default='')
+    row_count = models.BigIntegerField()
+    state = models.JSONField(default=dict, blank=True)
+    completeness = models.FloatField(blank=True, null=True)
+    drift = models.JSONField(default=dict, blank=True)
+    drift_score = models.FloatField(blank=True, null=True)
+    arrived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-arrived_at"]
+        indexes = [models.Index(fields=["monitor", "-arrived_at"], name="api_snapshot_monitor_idx")]
@@ -1,7 +1,7 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
-from .models import DataSourceConnection
+from .models import DataSourceConnection, DatasetProfile
 
 
 User = get_user_model()
@@ -51,6 +51,7 @@ class MyTokenObtainPairSerializer(serializers.Serializer):
 
 class DataSourceConnectionSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    api_token = serializers.CharField(write_only=True, required=False, allow_blank=True)
 
     class Meta:
         model = DataSourceConnection
@@ -62,6 +63,8 @@ class DataSourceConnectionSerializer(serializers.ModelSerializer):
             "username",
             "password",
             "database",
+            "connector_url",
+            "api_token",
             "created_at",
             "updated_at",
         ]
@@ -73,9 +76,29 @@ class DataSourceConnectionSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
+        api_token = validated_data.pop("api_token", None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if password:  # only update password if sent
             instance.password = password  # handled by model’s encryption logic
+        if api_token:
+            instance.api_token = api_token
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class DatasetProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DatasetProfile
+        fields = [
+            "blob_name",
+            "file_format",
+            "status",
+            "generation",
+            "size",
+            "row_count",
+            "columns",
+            "error",
+            "created_at",
+            "profiled_at",
+        ]
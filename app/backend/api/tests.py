@@ -1,3 +1,162 @@
-from django.test import TestCase
+import io
+import os
+import time
+from unittest import mock
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from .models import DataSourceConnection, DatasetAccess, DatasetMonitor, DatasetProfile
+from .utils.connectivity import check_connection
+from .utils.connector_client import proxy_request_headers
+from .utils.crypto import is_current, reset_fernet
+from .utils.monitoring import pull_from_connector
+
+
+class CheckConnectionTests(SimpleTestCase):
+    def connection(self, name, port):
+        return DataSourceConnection(
+            connector_id="c1", name=name, host="db.example.com", port=port, username="u", database="d",
+        )
+
+    def test_unsupported_type_is_not_probed(self):
+        with mock.patch("api.utils.connectivity._connect") as connect:
+            result = check_connection(self.connection("snowflake", "443"))
+        connect.assert_not_called()
+        self.assertEqual(result["status"], "unsupported")
+        self.assertEqual(result["db_type"], "snowflake")
+
+    def test_redshift_is_probed_with_postgres_driver(self):
+        connection = self.connection("redshift", "")
+        with mock.patch.object(DataSourceConnection, "password", "secret"), \
+                mock.patch("psycopg2.connect") as connect:
+            result = check_connection(connection)
+        self.assertEqual(result["status"], "ok")
+        self.assertEqual(connect.call_args.kwargs["port"], 5439)
+
+
+class ProxyHeaderTests(SimpleTestCase):
+    def test_identity_encoding_when_client_sent_none(self):
+        headers = proxy_request_headers({"Content-Type": "application/json", "Cookie": "x"})
+        self.assertEqual(headers, {"Content-Type": "application/json", "Accept-Encoding": "identity"})
+
+    def test_client_encoding_is_forwarded(self):
+        self.assertEqual(proxy_request_headers({"Accept-Encoding": "gzip"})["Accept-Encoding"], "gzip")
+
+
+class DatasetAccessTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user(email="owner@example.com", password="pw")
+        self.other = User.objects.create_user(email="other@example.com", password="pw")
+        DatasetAccess.objects.create(user=self.owner, dataset="sales.csv")
+        self.client = APIClient()
+
+    def get(self, user, path):
+        self.client.force_authenticate(user)
+        return self.client.get(f"/api/product/datasets/sales.csv/{path}/")
+
+    def test_profile_is_scoped_to_the_uploader(self):
+        DatasetProfile.objects.create(blob_name="sales.csv", file_format="csv", status="done")
+        self.assertEqual(self.get(self.owner, "profile").status_code, 200)
+        self.assertEqual(self.get(self.other, "profile").status_code, 404)
+        self.assertEqual(self.get(None, "profile").status_code, 401)
+
+    def test_preview_is_scoped_to_the_uploader(self):
+        preview = {"columns": ["id"], "rows": [[1]]}
+        with mock.patch("api.views.dataset_preview", return_value=preview) as dataset_preview:
+            self.assertEqual(self.get(self.other, "preview").status_code, 404)
+            dataset_preview.assert_not_called()
+            self.assertEqual(self.get(self.owner, "preview").data, preview)
+
+    def test_monitoring_is_scoped_to_the_dataset_owner(self):
+        DatasetMonitor.objects.create(dataset="sales.csv")
+        self.assertEqual(self.get(self.owner, "monitoring").status_code, 200)
+        self.assertEqual(self.get(self.other, "monitoring").status_code, 404)
+
+    def test_pull_into_another_users_dataset_is_refused(self):
+        connection = DataSourceConnection(user=self.other, connector_id="c1", connector_url="http://connector")
+        with mock.patch.object(DataSourceConnection, "api_token", "token"), \
+                mock.patch("api.utils.monitoring.connector_request") as connector_request:
+            with self.assertRaises(PermissionError):
+                pull_from_connector(connection, "sales.csv", "select 1")
+        connector_request.assert_not_called()
+
+
+class ConnectionListTests(TestCase):
+    url = "/api/product/source/connections/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="owner@example.com", password="pw")
+        for i in range(3):
+            DataSourceConnection.objects.create(
+                user=self.user, connector_id=f"c{i}", name="postgres", host="db", port="5432", username="u",
+                database=f"d{i}",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_every_connection(self):
+        first = self.client.get(self.url, {"page_size": 2}).data
+        second = self.client.get(first["next"]).data
+        ids = [c["connector_id"] for c in first["results"] + second["results"]]
+        self.assertEqual(sorted(ids), ["c0", "c1", "c2"])
+        self.assertIsNone(second["next"])
+
+    def test_unchanged_list_revalidates_with_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_deletion_is_never_answered_with_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        DataSourceConnection.objects.filter(connector_id="c1").delete()
+        for headers in ({"HTTP_IF_NONE_MATCH": etag}, {"HTTP_IF_MODIFIED_SINCE": http_date(time.time() + 60)}):
+            response = self.client.get(self.url, **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), 2)
+
+
+class RotateEncryptionKeysTests(TestCase):
+    def setUp(self):
+        self.old, self.new = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+        self.use_keys(self.old)
+        self.addCleanup(reset_fernet)
+        user = get_user_model().objects.create_user(email="owner@example.com", password="pw")
+        for i in range(3):
+            connection = DataSourceConnection(
+                user=user, connector_id=f"c{i}", name="postgres", host="db", port="5432", username="u",
+                database=f"d{i}",
+            )
+            connection.password = f"secret{i}"
+            connection.api_token = f"token{i}"
+            connection.save()
+        self.use_keys(self.new, self.old)
+
+    def use_keys(self, *keys):
+        patcher = mock.patch.dict(os.environ, {"FERNET_KEYS": ",".join(keys)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_fernet()
+
+    def rotate(self, *args):
+        out = io.StringIO()
+        call_command("rotate_encryption_keys", *args, stdout=out)
+        return out.getvalue()
+
+    def test_secrets_are_reencrypted_with_the_newest_key(self):
+        before = dict(DataSourceConnection.objects.values_list("connector_id", "updated_at"))
+        self.assertIn("Re-encrypted 3 of 3", self.rotate("--batch-size", "2"))
+        for connection in DataSourceConnection.objects.all():
+            self.assertTrue(is_current(connection._password) and is_current(connection._api_token))
+            self.assertEqual(connection.password, f"secret{connection.connector_id[1:]}")
+            self.assertEqual(connection.updated_at, before[connection.connector_id])
+        self.assertIn("Re-encrypted 0 of 3", self.rotate())
+
+    def test_dry_run_writes_nothing(self):
+        self.assertIn("Would re-encrypt 3 of 3", self.rotate("--dry-run"))
+        passwords = DataSourceConnection.objects.values_list("_password", flat=True)
+        self.assertFalse(any(is_current(value) for value in passwords))
@@ -7,6 +7,9 @@ from api.views import (
     LocalConnectorDownloadView,
     LocalConnectorHealthCheckView,
     FirebaseFileUploadView,
+    DatasetProfileView,
+    DatasetPreviewView,
+    DatasetMonitoringView,
     DataSourceConnectionViewSet,
 )
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
@@ -30,6 +33,9 @@ urlpatterns = [
     path('connector/health/', LocalConnectorHealthCheckView.as_view(), name='local_connector_health'),
 
     path('product/source/uploadFile/', FirebaseFileUploadView.as_view(), name='firebase-upload'),
+    path('product/datasets/<path:name>/profile/', DatasetProfileView.as_view(), name='dataset-profile'),
+    path('product/datasets/<path:name>/preview/', DatasetPreviewView.as_view(), name='dataset-preview'),
+    path('product/datasets/<path:name>/monitoring/', DatasetMonitoringView.as_view(), name='dataset-monitoring'),
 
 ]
 
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.utils import timezone
+
+TEST_CONNECT_TIMEOUT = int(os.getenv("CONNECTION_TEST_TIMEOUT", "5"))   # seconds, per connection attempt
+TEST_WORKERS = int(os.getenv("CONNECTION_TEST_WORKERS", "16"))         # concurrent attempts across all requests
+TEST_CACHE_TTL = int(os.getenv("CONNECTION_TEST_CACHE_TTL", "30"))
+MAX_BULK_TESTS = int(os.getenv("CONNECTION_TEST_MAX_BULK", "200"))
+
+DEFAULT_PORTS = {"mysql": 3306, "postgres": 5432, "redshift": 5439}
+DRIVERS = {"mysql": "mysql", "postgres": "postgres", "redshift": "postgres"}  # Redshift speaks the Postgres protocol
+
+_executor = ThreadPoolExecutor(max_workers=TEST_WORKERS, thread_name_prefix="connection-test")
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def db_type(connection):
+    """
+    Saved connections are named after the connector they were made with
+    (mysql, postgres, snowflake...). Unnamed ones are guessed from the port.
+    """
+    name = (connection.name or "").strip().lower()
+    if not name:
+        return "mysql" if str(connection.port) == "3306" else "postgres"
+    return name
+
+
+def _connect(kind, settings):
+    if DRIVERS[kind] == "mysql":
+        import mysql.connector
+
+        return mysql.connector.connect(
+            host=settings["host"], port=settings["port"],
+            user=settings["user"], password=settings["password"],
+            database=settings["database"], connection_timeout=TEST_CONNECT_TIMEOUT,
+        )
+    import psycopg2
+
+    return psycopg2.connect(
+        host=settings["host"], port=settings["port"],
+        user=settings["user"], password=settings["password"],
+        dbname=settings["database"], connect_timeout=TEST_CONNECT_TIMEOUT,
+    )
+
+
+def check_connection(connection):
+    """
+    Open a real connection with the stored credentials and run SELECT 1.
+    Returns {"status": "ok" | "error" | "unsupported", "db_type", "connect_ms",
+    "latency_ms", ...}; never raises.
+    """
+    kind = db_type(connection)
+    result = {"db_type": kind, "checked_at": timezone.now()}
+    if kind not in DRIVERS:
+        return {**result, "status": "unsupported", "error": f"Testing {kind} connections is not supported"}
+    if not connection.host:
+        return {**result, "status": "error", "error": "No host configured"}
+    password = connection.password
+    if password is None:
+        return {**result, "status": "error", "error": "Password could not be decrypted"}
+    try:
+        port = int(connection.port or DEFAULT_PORTS[kind])
+    except ValueError:
+        return {**result, "status": "error", "error": f"Invalid port {connection.port!r}"}
+
+    settings = {
+        "host": connection.host, "port": port, "user": connection.username,
+        "password": password, "database": connection.database,
+    }
+    started = time.perf_counter()
+    conn = None
+    try:
+        conn = _connect(kind, settings)
+        connected = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        finished = time.perf_counter()
+    except Exception as e:
+        return {
+            **result,
+            "status": "error",
+            "error": " ".join(str(e).split()) or e.__class__.__name__,  # drivers wrap their messages over lines
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    return {
+        **result,
+        "status": "ok",
+        "connect_ms": round((connected - started) * 1000, 1),
+        "latency_ms": round((finished - started) * 1000, 1),
+    }
+
+
+def _cache_key(connection):
+    # Editing a connection bumps updated_at, so its old result is never served
+    return f"connection-test:{connection.connector_id}:{connection.updated_at.timestamp()}"
+
+
+def _run_cached(connection, key):
+    try:
+        result = check_connection(connection)
+        cache.set(key, result, TEST_CACHE_TTL)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _submit(connection, refresh=False):
+    """Future of the connection's test result, sharing attempts already in flight for it."""
+    key = _cache_key(connection)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            cached = None if refresh else cache.get(key)
+            if cached is not None:
+                return None, {**cached, "cached": True}
+            future = _inflight[key] = _executor.submit(_run_cached, connection, key)
+    return future, None
+
+
+def check_connections(connections, refresh=False):
+    """
+    Test many connections concurrently on the shared bounded pool. Results
+    are cached for TEST_CACHE_TTL and concurrent requests for the same
+    connection share one attempt, so repeated page loads do not pile up
+    connection attempts. Returns {connector_id: result}.
+    """
+    pending, results = {}, {}
+    for connection in connections:
+        future, cached = _submit(connection, refresh)
+        if future is None:
+            results[connection.connector_id] = cached
+        else:
+            pending[connection.connector_id] = future
+    for connector_id, future in pending.items():
+        results[connector_id] = {**future.result(), "cached": False}
+    return results
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One keep-alive pool per connector host, so repeat calls skip the TCP/TLS
+# (and ngrok tunnel) handshake instead of opening a new connection each time.
+POOL_CONNECTIONS = int(os.getenv("CONNECTOR_CLIENT_HOSTS", "64"))     # connector hosts kept warm
+POOL_MAXSIZE = int(os.getenv("CONNECTOR_CLIENT_POOL_SIZE", "16"))     # sockets kept per host
+CONNECT_TIMEOUT = float(os.getenv("CONNECTOR_CONNECT_TIMEOUT", "3"))  # seconds
+HEALTH_TIMEOUT = float(os.getenv("CONNECTOR_HEALTH_TIMEOUT", "5"))    # seconds, per connector
+MAX_HEALTH_TIMEOUT = 30
+FANOUT_WORKERS = int(os.getenv("CONNECTOR_FANOUT_WORKERS", "32"))
+PROXY_TIMEOUT = float(os.getenv("CONNECTOR_PROXY_TIMEOUT", "300"))    # seconds between upstream reads
+PROXY_CHUNK_SIZE = int(os.getenv("CONNECTOR_PROXY_CHUNK_SIZE", str(64 * 1024)))
+
+# Headers passed through the query proxy in each direction
+PROXY_REQUEST_HEADERS = ("Content-Type", "Accept", "Accept-Encoding", "X-DATA-SOURCE")
+PROXY_RESPONSE_HEADERS = ("Content-Encoding", "Vary", "X-Cache", "X-Next-Page-Token")
+
+_session = None
+_session_lock = threading.Lock()
+_fanout = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="connector-health")
+
+
+def get_session():
+    """The process-wide requests.Session used for every connector call."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def connector_request(method, base_url, token, path, timeout=None, **kwargs):
+    """Send a request to a connector with its API token over the shared session."""
+    headers = {**kwargs.pop("headers", {}), "X-API-TOKEN": token}
+    if timeout is None:
+        timeout = HEALTH_TIMEOUT
+    if not isinstance(timeout, tuple):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    return get_session().request(
+        method, f"{base_url.rstrip('/')}{path}", headers=headers, timeout=timeout, **kwargs
+    )
+
+
+def proxy_request_headers(incoming):
+    """The client's headers to forward to its connector."""
+    headers = {name: incoming[name] for name in PROXY_REQUEST_HEADERS if name in incoming}
+    # Otherwise requests asks for gzip itself and the compressed body is relayed
+    # as is, with its Content-Encoding, to a client that never accepted it
+    headers.setdefault("Accept-Encoding", "identity")
+    return headers
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def check_health(base_url, token, timeout=HEALTH_TIMEOUT):
+    """Call a connector's /health and summarise the outcome; never raises."""
+    started = time.perf_counter()
+    try:
+        # verbose needs the token, so a wrong token shows up as a 401 rather than "ok"
+        resp = connector_request("GET", base_url, token, "/health", timeout=timeout, params={"verbose": 1})
+    except requests.Timeout:
+        return {"status": "timeout", "error": f"No answer within {timeout}s", "latency_ms": _elapsed_ms(started)}
+    except requests.RequestException as e:
+        return {"status": "unreachable", "error": str(e), "latency_ms": _elapsed_ms(started)}
+
+    try:
+        body = resp.json()
+    except ValueError:
+        body = None
+    return {
+        "status": "ok" if resp.ok else "error",
+        "http_status": resp.status_code,
+        "latency_ms": _elapsed_ms(started),
+        "health": body,
+    }
+
+
+def check_many(targets, timeout=HEALTH_TIMEOUT):
+    """
+    Check several connectors concurrently. `targets` maps a key to
+    (base_url, token); the result maps the same keys to check_health results.
+    The whole call takes about as long as the slowest connector, capped at
+    `timeout`, rather than the sum of all of them.
+    """
+    futures = {key: _fanout.submit(check_health, url, token, timeout) for key, (url, token) in targets.items()}
+    # requests' read timeout is per socket read, so also bound the total wait
+    done, _ = wait(futures.values(), timeout=timeout + 1)
+
+    results = {}
+    for key, future in futures.items():
+        if future in done:
+            results[key] = future.result()
+        else:
+            future.cancel()
+            results[key] = {"status": "timeout", "error": f"No answer within {timeout}s"}
+    return results
+
+
+def stream_body(resp, chunk_size=PROXY_CHUNK_SIZE):
+    """
+    Yield a streamed upstream body as it arrives, still content-encoded, and
+    hand the socket back to the pool once it has been read (or drop it if the
+    client went away halfway).
+    """
+    try:
+        yield from resp.raw.stream(chunk_size, decode_content=False)
+    finally:
+        resp.close()
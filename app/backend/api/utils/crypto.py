@@ -1,15 +1,32 @@
+import functools
 import os
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_fernet():
-    key = os.getenv("FERNET_KEY")
-    if not key:
+@functools.lru_cache(maxsize=1)
+def _keys():
+    """
+    FERNET_KEYS is a comma-separated list, newest key first: new values are
+    encrypted with the first key and any listed key can decrypt. FERNET_KEY
+    alone still works when there is nothing to rotate.
+    """
+    keys = [key.strip() for key in (os.getenv("FERNET_KEYS") or os.getenv("FERNET_KEY") or "").split(",")]
+    keys = [key for key in keys if key]
+    if not keys:
         raise ImproperlyConfigured("FERNET_KEY is not set in environment variables.")
-    return Fernet(key)
+    return [Fernet(key) for key in keys]
+
+@functools.lru_cache(maxsize=1)
+def get_fernet():
+    # Built once per process; call reset_fernet() after changing the keys at runtime
+    return MultiFernet(_keys())
+
+def reset_fernet():
+    _keys.cache_clear()
+    get_fernet.cache_clear()
 
 def encrypt_text(plain_text: str) -> str:
     if not plain_text:
@@ -22,3 +39,17 @@ def decrypt_text(encrypted_text: str) -> str:
         return ""
     f = get_fernet()
     return f.decrypt(encrypted_text.encode()).decode()
+
+def is_current(encrypted_text: str) -> bool:
+    """Whether a value is already encrypted with the newest key."""
+    try:
+        _keys()[0].decrypt(encrypted_text.encode())
+    except InvalidToken:
+        return False
+    return True
+
+def rotate_text(encrypted_text: str) -> str:
+    """Re-encrypt a value with the newest key; raises InvalidToken if no key can decrypt it."""
+    if not encrypted_text:
+        return encrypted_text
+    return get_fernet().rotate(encrypted_text.encode()).decode()
@@ -0,0 +1,180 @@
+import logging
+import os
+import random
+import threading
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import ConnectorHealthCheck, ConnectorStatus, DataSourceConnection
+from .connector_client import HEALTH_TIMEOUT, check_many
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = int(os.getenv("CONNECTOR_POLL_INTERVAL", "30"))          # seconds between checks of a healthy connector
+POLL_MAX_INTERVAL = int(os.getenv("CONNECTOR_POLL_MAX_INTERVAL", "900"))  # backoff ceiling for dead connectors
+POLL_BATCH_SIZE = int(os.getenv("CONNECTOR_POLL_BATCH_SIZE", "200"))
+HISTORY_DAYS = int(os.getenv("CONNECTOR_HEALTH_HISTORY_DAYS", "7"))
+STATUS_CACHE_TTL = int(os.getenv("CONNECTOR_STATUS_CACHE_TTL", "10"))    # seconds a read-through status stays cached
+POLL_CLAIM_SECONDS = int(os.getenv("CONNECTOR_POLL_CLAIM_SECONDS", "60"))  # how long a claimed connector is held
+UPTIME_WINDOWS = {"24h": timedelta(hours=24), "7d": timedelta(days=7)}
+
+STATUS_FIELDS = ("status", "http_status", "latency_ms", "error", "checked_at", "next_check_at")
+
+
+def _cache_key(connector_id):
+    return f"connector-status:{connector_id}"
+
+
+def _as_dict(row):
+    return {field: getattr(row, field) for field in STATUS_FIELDS}
+
+
+def next_interval(ok, failures):
+    """Healthy connectors are polled every POLL_INTERVAL; failing ones back off exponentially."""
+    interval = POLL_INTERVAL if ok else min(POLL_INTERVAL * 2 ** failures, POLL_MAX_INTERVAL)
+    return interval * random.uniform(0.9, 1.1)  # jitter keeps checks from bunching up
+
+
+def latest_statuses(connector_ids):
+    """
+    Latest polled status per connector_id, from the cache when possible and
+    the ConnectorStatus table otherwise. Never-polled connectors are absent.
+    Entries are only filled here, so they are at most STATUS_CACHE_TTL old.
+    """
+    keys = {_cache_key(cid): cid for cid in connector_ids}
+    found = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = [cid for cid in connector_ids if cid not in found]
+    if missing:
+        loaded = {row.connection_id: _as_dict(row) for row in ConnectorStatus.objects.filter(connection_id__in=missing)}
+        cache.set_many({_cache_key(cid): value for cid, value in loaded.items()}, STATUS_CACHE_TTL)
+        found.update(loaded)
+    return found
+
+
+def uptime(connection, window, now=None):
+    """
+    Share of `window` during which the connector answered healthy. Each
+    check's result is assumed to hold until the next one, so backed-off
+    failures weigh as much as frequent successes.
+    """
+    now = now or timezone.now()
+    start = now - window
+    checks = list(
+        connection.health_checks.filter(checked_at__gte=start)
+        .order_by("checked_at").values_list("status", "checked_at")
+    )
+    if not checks:
+        return None
+    up = total = 0.0
+    for (status, checked_at), following in zip(checks, checks[1:] + [(None, now)]):
+        span = (following[1] - checked_at).total_seconds()
+        total += span
+        if status == "ok":
+            up += span
+    return round(up / total, 4) if total else (1.0 if checks[-1][0] == "ok" else 0.0)
+
+
+class HealthPoller:
+    """
+    Polls every connection that has a local connector, each on its own
+    schedule: healthy ones every POLL_INTERVAL, failing ones with
+    exponential backoff up to POLL_MAX_INTERVAL. Schedules live in
+    ConnectorStatus. Each batch is claimed by moving its next_check_at
+    POLL_CLAIM_SECONDS ahead in one transaction (rows locked with SKIP
+    LOCKED where the database supports it), so several pollers can share
+    the work without checking a connector twice.
+    """
+
+    def __init__(self, timeout=HEALTH_TIMEOUT, batch_size=POLL_BATCH_SIZE):
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._last_prune = None
+
+    def due(self, now):
+        return (
+            DataSourceConnection.objects.exclude(connector_url__isnull=True).exclude(connector_url="")
+            .filter(Q(health__isnull=True) | Q(health__next_check_at__lte=now))
+            .select_related("health")
+            .order_by(F("health__next_check_at").asc(nulls_first=True))[:self.batch_size]
+        )
+
+    @transaction.atomic
+    def claim(self, now):
+        """Take the due connectors and push their next check out so other pollers skip them."""
+        connections = list(self.due(now).select_for_update(skip_locked=True, of=("self",)))
+        held_until = now + timedelta(seconds=POLL_CLAIM_SECONDS)
+        ConnectorStatus.objects.filter(connection__in=connections).update(next_check_at=held_until)
+        ConnectorStatus.objects.bulk_create(
+            [
+                ConnectorStatus(connection=c, status="pending", checked_at=now, next_check_at=held_until)
+                for c in connections if getattr(c, "health", None) is None
+            ],
+            ignore_conflicts=True,
+        )
+        return connections
+
+    def run_once(self):
+        """Check every connector that is due; returns how many were checked."""
+        now = timezone.now()
+        connections = self.claim(now)
+        targets, skipped = {}, {}
+        for connection in connections:
+            token = connection.api_token
+            if token:
+                targets[connection.connector_id] = (connection.connector_url, token)
+            else:
+                skipped[connection.connector_id] = {"status": "error", "error": "API token could not be decrypted"}
+        results = {**check_many(targets, self.timeout), **skipped}
+
+        checked_at = timezone.now()
+        history = []
+        for connection in connections:
+            result = results[connection.connector_id]
+            ok = result["status"] == "ok"
+            previous = getattr(connection, "health", None)
+            failures = 0 if ok else (previous.consecutive_failures + 1 if previous else 1)
+            row, _ = ConnectorStatus.objects.update_or_create(
+                connection=connection,
+                defaults={
+                    "status": result["status"],
+                    "http_status": result.get("http_status"),
+                    "latency_ms": result.get("latency_ms"),
+                    "error": result.get("error", ""),
+                    "consecutive_failures": failures,
+                    "checked_at": checked_at,
+                    "next_check_at": checked_at + timedelta(seconds=next_interval(ok, failures)),
+                },
+            )
+            history.append(ConnectorHealthCheck(
+                connection=connection, status=row.status, latency_ms=row.latency_ms, checked_at=checked_at
+            ))
+        ConnectorHealthCheck.objects.bulk_create(history)
+        self.prune(checked_at)
+        return len(connections)
+
+    def prune(self, now):
+        if self._last_prune and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+        ConnectorHealthCheck.objects.filter(checked_at__lt=now - timedelta(days=HISTORY_DAYS)).delete()
+
+    def seconds_until_due(self):
+        upcoming = ConnectorStatus.objects.order_by("next_check_at").values_list("next_check_at", flat=True).first()
+        if upcoming is None:
+            return POLL_INTERVAL
+        return min(max((upcoming - timezone.now()).total_seconds(), 1), POLL_INTERVAL)
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                checked = self.run_once()
+            except Exception:
+                logger.exception("Connector health poll failed")
+                checked = 0
+            if checked < self.batch_size:
+                stop_event.wait(self.seconds_until_due())
@@ -0,0 +1,227 @@
+import json
+import os
+import statistics
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import DatasetAccess, DatasetMonitor, DatasetSnapshot
+from .connector_client import PROXY_TIMEOUT, connector_request
+from .profiling import ColumnProfile, summarize_frames
+
+DRIFT_BINS = 10
+DRIFT_WARN = float(os.getenv("DRIFT_WARN_PSI", "0.1"))     # population stability index thresholds
+DRIFT_ALERT = float(os.getenv("DRIFT_ALERT_PSI", "0.25"))
+PSI_EPSILON = 1e-4
+SNAPSHOT_RETENTION = int(os.getenv("MONITOR_SNAPSHOT_RETENTION", "200"))  # per dataset
+NUMERIC = ("integer", "float")
+
+
+def _psi(expected, actual):
+    expected = np.clip(np.asarray(expected, dtype=np.float64), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def numeric_psi(baseline, current):
+    """PSI over the baseline's decile bins, read from both quantile sketches."""
+    edges = sorted({baseline.quantiles.quantile(i / DRIFT_BINS) for i in range(1, DRIFT_BINS)})
+    if not edges:
+        return None
+
+    def proportions(sketch):
+        return np.diff([0.0, *(sketch.cdf(edge) for edge in edges), 1.0])
+
+    return _psi(proportions(baseline.quantiles), proportions(current.quantiles))
+
+
+def categorical_psi(baseline, current):
+    """PSI over the tracked categories of both batches plus everything folded into "other"."""
+    categories = sorted(set(baseline.top.counts) | set(current.top.counts))
+
+    def proportions(top):
+        total = sum(top.counts.values()) + top.other
+        return [top.counts.get(c, 0) / total for c in categories] + [top.other / total]
+
+    if not categories or not baseline.top.counts or not current.top.counts:
+        return None
+    return _psi(proportions(baseline.top), proportions(current.top))
+
+
+def column_drift(baseline, current):
+    drift = {}
+    if baseline.null_rate is not None and current.null_rate is not None:
+        drift["null_rate_delta"] = round(current.null_rate - baseline.null_rate, 6)
+    if baseline.kind != current.kind:
+        drift["type_changed"] = [baseline.kind, current.kind]
+    if current.kind in NUMERIC and baseline.kind in NUMERIC:
+        psi = numeric_psi(baseline, current) if baseline.quantiles.count and current.quantiles.count else None
+    else:
+        psi = categorical_psi(baseline, current)
+    drift["psi"] = None if psi is None else round(psi, 6)
+    if psi is None:
+        drift["level"] = "unknown"
+    else:
+        drift["level"] = "alert" if psi >= DRIFT_ALERT else "warn" if psi >= DRIFT_WARN else "ok"
+    return drift
+
+
+def completeness(columns):
+    cells = sum(column.count for column in columns)
+    if not cells:
+        return None
+    return round(1 - sum(column.nulls for column in columns) / cells, 6)
+
+
+def _columns(state):
+    return {column["name"]: ColumnProfile.from_state(column) for column in state.get("columns", [])}
+
+
+@transaction.atomic
+def record_snapshot(dataset, rows, columns, source, version="", arrived_at=None):
+    """
+    Fold one arriving batch (summarized as ColumnProfiles) into the dataset's
+    running state and score its drift against the previous batch. Only the
+    stored summaries are read, never the earlier data.
+    """
+    arrived_at = arrived_at or timezone.now()
+    monitor, _ = DatasetMonitor.objects.select_for_update().get_or_create(dataset=dataset)
+
+    drift = {}
+    previous = monitor.snapshots.first()
+    if previous is not None:
+        baseline = _columns(previous.state)
+        for column in columns:
+            if column.name in baseline:
+                drift[column.name] = column_drift(baseline[column.name], column)
+            else:
+                drift[column.name] = {"level": "added"}
+        for name in baseline.keys() - {column.name for column in columns}:
+            drift[name] = {"level": "removed"}
+    scores = [d["psi"] for d in drift.values() if d.get("psi") is not None]
+
+    merged = _columns(monitor.state)
+    for column in columns:
+        if column.name in merged:
+            merged[column.name].merge(column)
+        else:
+            merged[column.name] = ColumnProfile.from_state(column.to_state())
+    monitor.state = {"columns": [column.to_state() for column in merged.values()]}
+    monitor.row_count += rows
+    monitor.snapshot_count += 1
+    monitor.last_arrival_at = arrived_at
+    monitor.save()
+
+    snapshot = DatasetSnapshot.objects.create(
+        monitor=monitor,
+        source=source,
+        version=version,
+        row_count=rows,
+        # The distinct sketch is only kept in the running state; drift does not need it
+        state={"columns": [column.to_state(distinct=False) for column in columns]},
+        completeness=completeness(columns),
+        drift=drift,
+        drift_score=max(scores) if scores else None,
+        arrived_at=arrived_at,
+    )
+    stale = monitor.snapshots.values_list("pk", flat=True)[SNAPSHOT_RETENTION:]
+    DatasetSnapshot.objects.filter(pk__in=list(stale)).delete()
+    return snapshot
+
+
+def monitoring_report(monitor, history=20):
+    """Freshness, completeness and drift of a dataset from its stored summaries."""
+    now = timezone.now()
+    snapshots = list(monitor.snapshots.all()[:history])
+    arrivals = [snapshot.arrived_at for snapshot in snapshots]
+    gaps = [(newer - older).total_seconds() for newer, older in zip(arrivals, arrivals[1:])]
+    expected = statistics.median(gaps) if gaps else None
+    age = (now - monitor.last_arrival_at).total_seconds() if monitor.last_arrival_at else None
+
+    columns = _columns(monitor.state)
+    latest = snapshots[0] if snapshots else None
+    return {
+        "dataset": monitor.dataset,
+        "row_count": monitor.row_count,
+        "snapshot_count": monitor.snapshot_count,
+        "freshness": {
+            "last_arrival_at": monitor.last_arrival_at,
+            "age_seconds": age,
+            "expected_interval_seconds": expected,
+            "stale": bool(expected and age is not None and age > 2 * expected),
+        },
+        "completeness": {
+            "overall": completeness(columns.values()),
+            "latest": latest.completeness if latest else None,
+            "columns": {
+                name: None if column.null_rate is None else round(1 - column.null_rate, 6)
+                for name, column in columns.items()
+            },
+        },
+        "drift": {
+            "score": latest.drift_score if latest else None,
+            "columns": latest.drift if latest else {},
+        },
+        "columns": [column.to_dict() for column in columns.values()],
+        "history": [
+            {
+                "arrived_at": snapshot.arrived_at,
+                "source": snapshot.source,
+                "version": snapshot.version,
+                "row_count": snapshot.row_count,
+                "completeness": snapshot.completeness,
+                "drift_score": snapshot.drift_score,
+            }
+            for snapshot in snapshots
+        ],
+    }
+
+
+# Columnar type names from the local connector that need converting back
+_COLUMNAR_DECODERS = {
+    "decimal": lambda values: pd.to_numeric(values, errors="coerce"),
+    "datetime": lambda values: pd.to_datetime(values, errors="coerce"),
+    "date": lambda values: pd.to_datetime(values, errors="coerce"),
+}
+
+
+def _columnar_frames(response):
+    for line in response.iter_lines():
+        if not line:
+            continue
+        batch = json.loads(line)
+        if "error" in batch:
+            raise RuntimeError(batch["error"])
+        frame = pd.DataFrame({
+            name: _COLUMNAR_DECODERS.get(kind, pd.Series)(pd.Series(values, dtype=object))
+            for name, kind, values in zip(batch["columns"], batch["types"], batch["data"])
+        })
+        yield frame.infer_objects()
+
+
+def pull_from_connector(connection, dataset, query):
+    """
+    Stream a query's result from a connection's local connector in columnar
+    batches, summarize it batch by batch and record it as a new snapshot.
+    The connection's owner is given access to the dataset; pulling into a
+    dataset only other users can access raises PermissionError.
+    """
+    token = connection.api_token
+    if not connection.connector_url or not token:
+        raise ValueError("No local connector configured for this connection")
+    grants = DatasetAccess.objects.filter(dataset=dataset)
+    if grants.exists() and not grants.filter(user_id=connection.user_id).exists():
+        raise PermissionError(f"Dataset {dataset} belongs to another user")
+    with connector_request(
+        "POST", connection.connector_url, token, "/query",
+        timeout=PROXY_TIMEOUT, json={"query": query, "stream": True, "format": "columnar"}, stream=True,
+    ) as response:
+        if not response.ok:
+            raise RuntimeError(f"Connector answered {response.status_code}: {response.text[:200]}")
+        rows, columns = summarize_frames(_columnar_frames(response))
+    snapshot = record_snapshot(dataset, rows, columns, source="connector", version=uuid.uuid4().hex)
+    DatasetAccess.objects.get_or_create(user_id=connection.user_id, dataset=dataset)
+    return snapshot
@@ -0,0 +1,195 @@
+import collections
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.cache import cache
+
+from ..models import DatasetProfile
+from .profiling import file_format, read_chunks
+
+PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", "50"))
+MAX_PREVIEW_ROWS = int(os.getenv("PREVIEW_MAX_ROWS", "500"))
+PREVIEW_HEAD_BYTES = int(os.getenv("PREVIEW_HEAD_BYTES", str(256 * 1024)))           # first range read of a CSV
+PREVIEW_MAX_HEAD_BYTES = int(os.getenv("PREVIEW_MAX_HEAD_BYTES", str(8 * 1024 * 1024)))
+PREVIEW_BLOCK_SIZE = int(os.getenv("PREVIEW_BLOCK_SIZE", str(1024 * 1024)))          # Parquet range granularity
+PREVIEW_CACHED_BLOCKS = int(os.getenv("PREVIEW_CACHED_BLOCKS", "4"))                  # blocks a RangeReader keeps
+PREVIEW_CACHE_TTL = int(os.getenv("PREVIEW_CACHE_TTL", str(24 * 60 * 60)))
+MODES = ("head", "sample")
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Seekable, read-only view of a blob that fetches only the byte ranges
+    actually read, in PREVIEW_BLOCK_SIZE blocks. Parquet readers use it to
+    pull the footer and the row groups they need without downloading the
+    rest. Only the last `max_blocks` blocks are kept in memory.
+    """
+
+    def __init__(self, blob, size, block_size=PREVIEW_BLOCK_SIZE, max_blocks=PREVIEW_CACHED_BLOCKS):
+        self.blob = blob
+        self.size = size
+        self.block_size = block_size
+        self.max_blocks = max(max_blocks, 1)
+        self.position = 0
+        self.bytes_read = 0
+        self._blocks = collections.OrderedDict()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(offset, 0)
+        return self.position
+
+    def _block(self, index):
+        block = self._blocks.get(index)
+        if block is not None:
+            self._blocks.move_to_end(index)
+            return block
+        start = index * self.block_size
+        end = min(start + self.block_size, self.size) - 1
+        block = self._blocks[index] = self.blob.download_as_bytes(start=start, end=end)
+        self.bytes_read += len(block)
+        if len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def readinto(self, buffer):
+        remaining = min(len(buffer), self.size - self.position)
+        written = 0
+        while written < remaining:
+            index, offset = divmod(self.position, self.block_size)
+            chunk = self._block(index)[offset:offset + remaining - written]
+            buffer[written:written + len(chunk)] = chunk
+            written += len(chunk)
+            self.position += len(chunk)
+        return written
+
+
+def _resolve_blob(bucket, name):
+    """Blob pinned to its current generation, using the profiled generation to skip a metadata call."""
+    profile = DatasetProfile.objects.filter(blob_name=name, status="done").values("generation", "size").first()
+    if profile and profile["generation"] is not None and profile["size"] is not None:
+        return bucket.blob(name, generation=profile["generation"]), profile["generation"], profile["size"]
+    blob = bucket.get_blob(name)
+    if blob is None:
+        return None, None, None
+    return bucket.blob(name, generation=blob.generation), blob.generation, blob.size
+
+
+def _csv_head(blob, size, fmt, rows):
+    """Read growing head ranges until they hold `rows` complete rows (or the whole file)."""
+    length = PREVIEW_HEAD_BYTES
+    while True:
+        data = blob.download_as_bytes(start=0, end=min(length, size) - 1) if size else b""
+        complete = len(data) >= size
+        if not complete:
+            data = data[:data.rfind(b"\n") + 1]  # drop the partial last line
+        if data.count(b"\n") > rows + 1 or complete or length >= PREVIEW_MAX_HEAD_BYTES:
+            break
+        length = min(length * 4, PREVIEW_MAX_HEAD_BYTES)
+    if not data:
+        return pd.DataFrame(), 0, not complete
+    frame = pd.read_csv(io.BytesIO(data), sep="\t" if fmt == "tsv" else ",", nrows=rows + 1)
+    return frame.head(rows), len(data), not complete or len(frame) > rows
+
+
+def _parquet_head(blob, size, rows):
+    """
+    Read row groups one at a time, starting with the first, until `rows`
+    rows are collected; later row groups are never fetched.
+    """
+    reader = RangeReader(blob, size)
+    parquet = pq.ParquetFile(reader)
+    batches, collected = [], 0
+    for index in range(parquet.num_row_groups):
+        if collected >= rows:
+            break
+        for batch in parquet.iter_batches(batch_size=rows - collected, row_groups=[index]):
+            batches.append(batch)
+            collected += batch.num_rows
+            break
+    if batches:
+        frame = pa.Table.from_batches(batches).to_pandas()
+    else:
+        frame = parquet.schema_arrow.empty_table().to_pandas()
+    return frame, reader.bytes_read, parquet.metadata.num_rows > len(frame)
+
+
+def _reservoir(blob, fmt, rows, seed):
+    """
+    Uniform sample of `rows` rows from the whole object in one streamed
+    pass: every row gets a random priority and the lowest `rows` survive,
+    which is a reservoir sample computed a chunk at a time.
+    """
+    rng = np.random.default_rng(seed)
+    sample, keys, seen = None, np.empty(0), 0
+    with blob.open("rb") as fileobj:
+        for frame in read_chunks(fileobj, fmt):
+            seen += len(frame)
+            frame_keys = rng.random(len(frame))
+            if sample is not None:
+                frame = pd.concat([sample, frame], ignore_index=True)
+                frame_keys = np.concatenate([keys, frame_keys])
+            keep = np.argsort(frame_keys, kind="stable")[:rows]
+            keep.sort()  # keep file order among the survivors
+            sample, keys = frame.iloc[keep].reset_index(drop=True), frame_keys[keep]
+    return (sample if sample is not None else pd.DataFrame()), seen
+
+
+def _render(frame):
+    payload = json.loads(frame.to_json(orient="split", index=False, date_format="iso", double_precision=15))
+    return payload["columns"], payload["data"]
+
+
+def dataset_preview(bucket, name, rows=PREVIEW_ROWS, mode="head"):
+    """
+    Preview of a stored dataset: the first `rows` rows (head) or a uniform
+    sample (sample). Head previews read only the ranges they need: the
+    start of a CSV, the footer and first row group of a Parquet file.
+    Rendered previews are cached per blob generation, so an unchanged file
+    is never read twice. Returns None when the object does not exist.
+    """
+    fmt = file_format(name)
+    if fmt is None:
+        raise ValueError("Only CSV, TSV and Parquet files can be previewed")
+    blob, generation, size = _resolve_blob(bucket, name)
+    if blob is None:
+        return None
+
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    key = f"dataset-preview:{digest}:{generation}:{mode}:{rows}"
+    preview = cache.get(key)
+    if preview is not None:
+        return preview
+
+    if mode == "sample":
+        frame, seen = _reservoir(blob, fmt, rows, seed=generation)
+        extra = {"rows_scanned": seen, "bytes_read": size, "truncated": seen > len(frame)}
+    elif fmt == "parquet":
+        frame, bytes_read, truncated = _parquet_head(blob, size, rows)
+        extra = {"bytes_read": bytes_read, "truncated": truncated}
+    else:
+        frame, bytes_read, truncated = _csv_head(blob, size, fmt, rows)
+        extra = {"bytes_read": bytes_read, "truncated": truncated}
+
+    columns, data = _render(frame)
+    preview = {"name": name, "generation": generation, "mode": mode, "columns": columns, "rows": data, **extra}
+    cache.set(key, preview, PREVIEW_CACHE_TTL)
+    return preview
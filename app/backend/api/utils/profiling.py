@@ -0,0 +1,299 @@
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..models import DatasetProfile
+from .sketches import HyperLogLog, QuantileSketch, TopK
+
+logger = logging.getLogger(__name__)
+
+PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "2"))
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", "100000"))           # rows held in memory at once
+PROFILE_READ_CHUNK = int(os.getenv("PROFILE_READ_CHUNK", str(8 * 1024 * 1024)))  # bytes per storage range read
+
+FORMATS = {".csv": "csv", ".tsv": "tsv", ".parquet": "parquet", ".pq": "parquet"}
+
+_executor = ThreadPoolExecutor(max_workers=PROFILE_WORKERS, thread_name_prefix="dataset-profile")
+
+
+def file_format(name):
+    """Profilable format of a file name, or None."""
+    return FORMATS.get(os.path.splitext(name)[1].lower())
+
+
+def _kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "string"
+
+
+def _resolve_kind(kinds):
+    if not kinds:
+        return "string"
+    if len(kinds) == 1:
+        return next(iter(kinds))
+    if kinds <= {"integer", "float"}:
+        return "float"
+    return "string"
+
+
+def _scalar(value):
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ColumnProfile:
+    """
+    Running statistics for one column, fed one chunk at a time. The state is
+    mergeable (see merge/to_state), so summaries of separate batches of a
+    dataset combine without rereading the data.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.kinds = set()
+        self.minimum = None
+        self.maximum = None
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.distinct = HyperLogLog()
+        self.quantiles = QuantileSketch()
+        self.top = TopK()
+
+    def update(self, series):
+        self.count += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+        kind = _kind(values)
+        self.kinds.add(kind)
+
+        if kind in ("integer", "float"):
+            numbers = values.to_numpy(dtype=np.float64)
+            self._moments(numbers.size, float(numbers.mean()), float(np.square(numbers - numbers.mean()).sum()))
+            self._bound(float(numbers.min()), float(numbers.max()))
+            self.quantiles.update(numbers)
+            # Hash as float so 1 and 1.0 from differently typed chunks count once
+            hashed = pd.util.hash_array(numbers)
+        else:
+            if kind == "string":
+                values = values.astype(str)
+            low, high = values.min(), values.max()
+            if kind == "datetime":
+                low, high = low.isoformat(), high.isoformat()
+            self._bound(_scalar(low), _scalar(high))
+            self.top.update(values.value_counts(sort=False))
+            hashed = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        self.distinct.update(hashed)
+
+    def _moments(self, n, mean, m2):
+        # Chan et al.: combine a chunk's mean and M2 with the running ones, stable for any chunking
+        if not n:
+            return
+        total = self.numeric_count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.numeric_count * n / total
+        self.numeric_count = total
+
+    def _bound(self, low, high):
+        if low is None:
+            return
+        try:
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+        except TypeError:  # chunks disagreed on type, bounds are meaningless
+            self.minimum = self.maximum = None
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.kinds |= other.kinds
+        self._moments(other.numeric_count, other.mean, other.m2)
+        self._bound(other.minimum, other.maximum)
+        self.distinct.merge(other.distinct)
+        self.quantiles.merge(other.quantiles)
+        self.top.merge(other.top)
+
+    @property
+    def kind(self):
+        return _resolve_kind(self.kinds)
+
+    @property
+    def null_rate(self):
+        return self.nulls / self.count if self.count else None
+
+    def to_state(self, distinct=True):
+        """JSON-serializable state; leave out the distinct sketch (16 KiB) where it is not needed."""
+        state = {
+            "name": self.name,
+            "count": self.count,
+            "nulls": self.nulls,
+            "kinds": sorted(self.kinds),
+            "min": self.minimum,
+            "max": self.maximum,
+            "numeric_count": self.numeric_count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "quantiles": self.quantiles.to_state(),
+            "top": self.top.to_state(),
+        }
+        if distinct:
+            state["distinct"] = self.distinct.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        column = cls(state["name"])
+        column.count = state["count"]
+        column.nulls = state["nulls"]
+        column.kinds = set(state["kinds"])
+        column.minimum = state["min"]
+        column.maximum = state["max"]
+        column.numeric_count = state["numeric_count"]
+        column.mean = state["mean"]
+        column.m2 = state["m2"]
+        column.quantiles = QuantileSketch.from_state(state["quantiles"])
+        column.top = TopK.from_state(state["top"])
+        if "distinct" in state:
+            column.distinct = HyperLogLog.from_state(state["distinct"])
+        return column
+
+    def to_dict(self):
+        kind = self.kind
+        numeric = kind in ("integer", "float")
+        summary = {
+            "name": self.name,
+            "type": kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_rate": round(self.null_rate, 6) if self.count else None,
+            "min": None,
+            "max": None,
+            "mean": None,
+            "std": None,
+            "distinct_estimate": min(self.distinct.estimate(), self.count - self.nulls),
+        }
+        if (numeric or len(self.kinds) == 1) and self.minimum is not None:
+            cast = int if kind == "integer" else _scalar
+            summary["min"], summary["max"] = cast(self.minimum), cast(self.maximum)
+        if numeric and self.numeric_count:
+            summary["mean"] = self.mean
+            summary["std"] = math.sqrt(self.m2 / self.numeric_count)
+            # Bucket midpoints can fall just outside the observed range; clamp them to it
+            summary["quantiles"] = {
+                f"p{int(q * 100)}": min(max(self.quantiles.quantile(q), self.minimum), self.maximum)
+                for q in (0.05, 0.25, 0.5, 0.75, 0.95)
+            }
+        elif self.top.counts:
+            summary["top_values"] = [{"value": value, "count": count} for value, count in self.top.most_common(10)]
+        return summary
+
+
+def summarize_frames(frames):
+    """
+    Feed an iterable of DataFrames sharing one schema into ColumnProfiles;
+    only one frame is in memory at a time. Returns (row_count, columns).
+    """
+    columns = {}
+    rows = 0
+    for frame in frames:
+        rows += len(frame)
+        for name in frame.columns:
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = ColumnProfile(str(name))
+            column.update(frame[name])
+    return rows, list(columns.values())
+
+
+def profile_frames(frames):
+    rows, columns = summarize_frames(frames)
+    return {"row_count": rows, "columns": [column.to_dict() for column in columns]}
+
+
+def read_chunks(fileobj, fmt, chunk_rows=PROFILE_CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows from a CSV/TSV or Parquet file object."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(fileobj).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(fileobj, sep="\t" if fmt == "tsv" else ",", chunksize=chunk_rows, low_memory=True)
+
+
+def profile_blob(bucket, name):
+    """Profile a stored object by streaming it in ranged reads; memory stays bounded by the chunk size."""
+    blob = bucket.get_blob(name)
+    if blob is None:
+        raise FileNotFoundError(f"{name} is not in the bucket")
+    fmt = file_format(name)
+    with blob.open("rb", chunk_size=PROFILE_READ_CHUNK) as fileobj:
+        rows, columns = summarize_frames(read_chunks(fileobj, fmt))
+    return blob, fmt, rows, columns
+
+
+def run_profile(bucket, name):
+    from .monitoring import record_snapshot  # monitoring builds on ColumnProfile
+
+    close_old_connections()
+    try:
+        DatasetProfile.objects.filter(blob_name=name).update(status="running", error="")
+        try:
+            blob, fmt, rows, columns = profile_blob(bucket, name)
+        except Exception as e:
+            logger.exception("Profiling %s failed", name)
+            DatasetProfile.objects.filter(blob_name=name).update(status="failed", error=str(e))
+            return
+        DatasetProfile.objects.filter(blob_name=name).update(
+            status="done",
+            file_format=fmt,
+            generation=blob.generation,
+            size=blob.size,
+            row_count=rows,
+            columns=[column.to_dict() for column in columns],
+            profiled_at=timezone.now(),
+        )
+        # The same pass feeds the dataset's monitoring state, so monitoring never rereads the file
+        try:
+            record_snapshot(name, rows, columns, source="upload", version=str(blob.generation or ""))
+        except Exception:
+            logger.exception("Recording a monitoring snapshot of %s failed", name)
+    finally:
+        close_old_connections()
+
+
+def schedule_profile(bucket, name):
+    """Queue a freshly uploaded file for profiling; returns the profile status, or None if unsupported."""
+    fmt = file_format(name)
+    if fmt is None:
+        return None
+    # Plain UPDATE-then-INSERT rather than update_or_create: no long transaction to
+    # contend with profiling workers writing other rows (SQLite in development).
+    fields = {"status": "pending", "file_format": fmt, "generation": None, "error": ""}
+    if not DatasetProfile.objects.filter(blob_name=name).update(**fields):
+        DatasetProfile.objects.create(blob_name=name, **fields)
+    _executor.submit(run_profile, bucket, name)
+    return "pending"
@@ -0,0 +1,190 @@
+import base64
+import collections
+import math
+
+import numpy as np
+
+HLL_PRECISION = 14         # 2**14 one-byte registers, ~0.8% standard error
+QUANTILE_ACCURACY = 0.01   # relative error of quantile estimates
+QUANTILE_MAX_BUCKETS = 2048
+TOP_K = 50                 # categories tracked per column before folding into "other"
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with vectorized updates from 64-bit hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not hashes.size:
+            return
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Rank = leading zeros in the remaining bits + 1. They fit in a float64 mantissa, so log2 is exact.
+        rank = np.full(rest.shape, bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = bits - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * math.log(self.m / zeros)))  # linear counting for small sets
+        return int(round(raw))
+
+    def to_state(self):
+        return {"p": self.p, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state["p"])
+        sketch.registers = np.frombuffer(base64.b64decode(state["registers"]), dtype=np.uint8).copy()
+        return sketch
+
+
+class QuantileSketch:
+    """
+    DDSketch-style quantile sketch: values fall into logarithmically spaced
+    buckets, so every quantile is within QUANTILE_ACCURACY relative error.
+    Two sketches merge by adding bucket counts, which makes it cheap to
+    combine summaries of separate batches.
+    """
+
+    def __init__(self, accuracy=QUANTILE_ACCURACY, max_buckets=QUANTILE_MAX_BUCKETS):
+        self.accuracy = accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = collections.Counter()
+        self.negative = collections.Counter()
+        self.zeros = 0
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add(self, store, magnitudes):
+        if not magnitudes.size:
+            return
+        buckets, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                    return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            store[bucket] += count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+        self.zeros += int(np.count_nonzero(values == 0))
+        self._collapse()
+
+    def merge(self, other):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zeros += other.zeros
+        self._collapse()
+
+    def _collapse(self):
+        # Fold the buckets closest to zero together to bound memory; the tails keep their accuracy
+        for store in (self.positive, self.negative):
+            if len(store) > self.max_buckets:
+                keys = sorted(store)
+                excess = keys[:len(keys) - self.max_buckets + 1]
+                store[excess[-1]] = sum(store.pop(key) for key in excess)
+
+    def _value(self, bucket):
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def _ordered(self):
+        """(value, count) pairs in ascending value order."""
+        for bucket in sorted(self.negative, reverse=True):
+            yield -self._value(bucket), self.negative[bucket]
+        if self.zeros:
+            yield 0.0, self.zeros
+        for bucket in sorted(self.positive):
+            yield self._value(bucket), self.positive[bucket]
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for value, count in self._ordered():
+            seen += count
+            if seen > rank:
+                return value
+        return value
+
+    def cdf(self, x):
+        """Fraction of values <= x."""
+        total = self.count
+        if not total:
+            return 0.0
+        below = sum(count for value, count in self._ordered() if value <= x)
+        return below / total
+
+    def to_state(self):
+        return {
+            "accuracy": self.accuracy,
+            "zeros": self.zeros,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state["accuracy"])
+        sketch.zeros = state["zeros"]
+        sketch.positive.update({int(k): v for k, v in state["positive"].items()})
+        sketch.negative.update({int(k): v for k, v in state["negative"].items()})
+        return sketch
+
+
+class TopK:
+    """Counts of the most frequent categories; the rest are folded into `other`, so it stays mergeable."""
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.counts = collections.Counter()
+        self.other = 0
+
+    def update(self, value_counts):
+        """`value_counts` is a pandas Series of counts indexed by category."""
+        self.counts.update({str(key): int(count) for key, count in value_counts.items()})
+        self._trim()
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.other += other.other
+        self._trim()
+
+    def _trim(self):
+        if len(self.counts) > self.k:
+            kept = dict(self.counts.most_common(self.k))
+            self.other += sum(self.counts.values()) - sum(kept.values())
+            self.counts = collections.Counter(kept)
+
+    def most_common(self, n=None):
+        return self.counts.most_common(n)
+
+    def to_state(self):
+        return {"k": self.k, "counts": dict(self.counts), "other": self.other}
+
+    @classmethod
+    def from_state(cls, state):
+        top = cls(state["k"])
+        top.counts.update(state["counts"])
+        top.other = state["other"]
+        return top
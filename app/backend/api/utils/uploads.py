@@ -0,0 +1,141 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from google.cloud.storage.retry import DEFAULT_RETRY
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))                                      # concurrent uploads, all requests
+RESUMABLE_THRESHOLD = int(os.getenv("UPLOAD_RESUMABLE_THRESHOLD", str(8 * 1024 * 1024)))  # bytes
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))                    # bytes per resumable chunk
+CHUNK_ALIGNMENT = 256 * 1024  # GCS requires chunk sizes in multiples of 256 KiB
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="storage-upload")
+
+
+def chunk_size_for(size):
+    """Chunk size for a resumable upload, or None for a single-request upload of small files."""
+    if size is None or size > RESUMABLE_THRESHOLD:
+        return max(CHUNK_SIZE // CHUNK_ALIGNMENT, 1) * CHUNK_ALIGNMENT
+    return None
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def upload_file(bucket, file_obj):
+    """
+    Upload one file and report how it went; never raises. Large files go up
+    as a resumable upload in CHUNK_SIZE pieces, so a failure retries only the
+    chunk in flight rather than the whole file.
+    """
+    started = time.perf_counter()
+    chunk_size = chunk_size_for(file_obj.size)
+    result = {"name": file_obj.name, "size": file_obj.size, "resumable": chunk_size is not None}
+    try:
+        blob = bucket.blob(file_obj.name, chunk_size=chunk_size)
+        file_obj.seek(0)
+        blob.upload_from_file(
+            file_obj, content_type=file_obj.content_type, size=file_obj.size, retry=DEFAULT_RETRY
+        )
+    except Exception as e:
+        logger.exception("Upload of %s failed", file_obj.name)
+        return {**result, "status": "error", "error": str(e), "elapsed_ms": _elapsed_ms(started)}
+    return {**result, "status": "uploaded", "elapsed_ms": _elapsed_ms(started)}
+
+
+def upload_files(bucket, files):
+    """
+    Upload files in parallel on the shared, bounded upload pool; results keep
+    the input order. Files already streamed to storage by
+    StreamingStorageUploadHandler just report their outcome.
+    """
+    def upload(file_obj):
+        if isinstance(file_obj, StoredUpload):
+            return file_obj.result
+        return upload_file(bucket, file_obj)
+
+    return list(_executor.map(upload, files))
+
+
+class StoredUpload(UploadedFile):
+    """A multipart file that was written straight to storage while it arrived."""
+
+    def __init__(self, name, content_type, size, charset, result):
+        super().__init__(None, name, content_type, size, charset)
+        self.result = result
+
+
+class StreamingStorageUploadHandler(FileUploadHandler):
+    """
+    Streams each multipart file into a resumable storage upload as the
+    request body is read, instead of spooling it to a temp file first.
+    At most one CHUNK_SIZE buffer is held per request and nothing touches
+    local disk. Requests small enough for FILE_UPLOAD_MAX_MEMORY_SIZE are
+    left to the next (in-memory) handler, so they can still be uploaded in
+    parallel by upload_files.
+    """
+
+    def __init__(self, request, bucket):
+        super().__init__(request)
+        self.bucket = bucket
+        self.activated = False
+        self._writer = None
+        self._result = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.activated = not content_length or content_length > settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if not self.activated:
+            return
+        self._started = time.perf_counter()
+        self._result = {"name": self.file_name, "resumable": True}
+        try:
+            blob = self.bucket.blob(self.file_name)
+            self._writer = blob.open(
+                "wb", chunk_size=chunk_size_for(None), content_type=self.content_type, retry=DEFAULT_RETRY
+            )
+        except Exception as e:
+            self._fail(e)
+        raise StopFutureHandlers()
+
+    def _fail(self, error):
+        logger.exception("Streaming upload of %s failed", self.file_name)
+        self._writer = None
+        self._result.update(status="error", error=str(error))
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activated:
+            return raw_data
+        if self._writer is not None:
+            try:
+                self._writer.write(raw_data)
+            except Exception as e:
+                self._fail(e)
+        return None  # keep the rest of the file out of later handlers
+
+    def file_complete(self, file_size):
+        if not self.activated:
+            return None
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception as e:
+                self._fail(e)
+            else:
+                self._result["status"] = "uploaded"
+        self._writer = None
+        self._result.update(size=file_size, elapsed_ms=_elapsed_ms(self._started))
+        return StoredUpload(self.file_name, self.content_type, file_size, self.charset, self._result)
+
+    def upload_interrupted(self):
+        # Dropping the writer abandons the resumable session; storage expires it.
+        self._writer = None
@@ -4,17 +4,40 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from django.http import FileResponse, Http404, JsonResponse
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
 from firebase_config import storage_bucket
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
-from .models import DataSourceConnection
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.pagination import CursorPagination
+from .models import DataSourceConnection, DatasetAccess, DatasetMonitor, DatasetProfile
+from .utils.connector_client import (
+    HEALTH_TIMEOUT,
+    MAX_HEALTH_TIMEOUT,
+    PROXY_RESPONSE_HEADERS,
+    PROXY_TIMEOUT,
+    check_many,
+    connector_request,
+    proxy_request_headers,
+    stream_body,
+)
+from .utils.connectivity import MAX_BULK_TESTS, check_connections
+from .utils.health_poller import UPTIME_WINDOWS, latest_statuses, uptime
+from .utils.monitoring import monitoring_report, pull_from_connector
+from .utils.previews import MAX_PREVIEW_ROWS, MODES, PREVIEW_ROWS, dataset_preview
+from .utils.profiling import schedule_profile
+from .utils.uploads import StreamingStorageUploadHandler, upload_files
 from django.shortcuts import get_object_or_404
+import hashlib
 import os
 import requests
 
-from .serializers import RegisterSerializer, DataSourceConnectionSerializer
+from .serializers import RegisterSerializer, DataSourceConnectionSerializer, DatasetProfileSerializer
 
 User = get_user_model()
 
@@ -108,10 +131,8 @@ class LocalConnectorHealthCheckView(APIView):
             return Response({"detail": "Connector URL and API token required"}, status=400)
 
         try:
-            resp = requests.get(
-                f"{connector_url}/health",
-                headers={"X-API-TOKEN": api_token},
-                timeout=5
+            resp = connector_request(
+                "GET", connector_url, api_token, "/health", timeout=HEALTH_TIMEOUT, params={"verbose": 1}
             )
             return Response(resp.json(), status=resp.status_code)
         except requests.RequestException as e:
@@ -127,36 +148,119 @@ class FirebaseFileUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)  # Handles multipart/form-data
 
     def post(self, request):
+        # Large bodies stream straight into storage; small ones stay in memory. Never spooled to disk.
+        request.upload_handlers = [
+            StreamingStorageUploadHandler(request, storage_bucket),
+            MemoryFileUploadHandler(request),
+        ]
         files = request.FILES.getlist("file")  # <-- get all files
         if not files:
             return Response({"detail": "No files uploaded"}, status=status.HTTP_400_BAD_REQUEST)
 
-        uploaded_names = []
+        results = upload_files(storage_bucket, files)
+        uploaded = [r["name"] for r in results if r["status"] == "uploaded"]
+        if request.user.is_authenticated:
+            DatasetAccess.objects.bulk_create(
+                [DatasetAccess(user=request.user, dataset=name) for name in uploaded], ignore_conflicts=True
+            )
+        for result in results:
+            if result["status"] == "uploaded":
+                result["profile"] = schedule_profile(storage_bucket, result["name"])
+        if len(uploaded) == len(results):
+            message, code = "Files uploaded successfully", status.HTTP_201_CREATED
+        elif uploaded:
+            message, code = "Some files failed to upload", status.HTTP_207_MULTI_STATUS
+        else:
+            message, code = "Upload failed", status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        return Response({"message": message, "files": uploaded, "results": results}, status=code)
+
+
+def accessible_datasets(user):
+    """Names of the datasets a user uploaded or pulled."""
+    return DatasetAccess.objects.filter(user=user).values("dataset")
+
+
+class DatasetProfileView(APIView):
+    """
+    Column statistics of an uploaded file: row count, inferred types, null
+    rates, min/max and distinct estimates. Computed in the background after
+    upload, so poll until status is "done".
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
+    def get(self, request, name):
+        profile = get_object_or_404(DatasetProfile, blob_name=name, blob_name__in=accessible_datasets(request.user))
+        return Response(DatasetProfileSerializer(profile).data)
+
+
+class DatasetPreviewView(APIView):
+    """
+    First rows (?mode=head, default) or a uniform sample (?mode=sample) of an
+    uploaded file, ?rows=N. Cached per file version.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, name):
+        if not accessible_datasets(request.user).filter(dataset=name).exists():
+            raise Http404("Dataset not found")
+        mode = request.query_params.get("mode", "head")
+        if mode not in MODES:
+            return Response({"detail": f"mode must be one of {', '.join(MODES)}"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            for file_obj in files:
-                print("🔥 Uploading file to Firebase Storage...")
-                print("Bucket name:", storage_bucket.name)
-                print("File name:", file_obj.name)
-                print("Content type:", file_obj.content_type)
+            rows = int(request.query_params.get("rows", PREVIEW_ROWS))
+        except ValueError:
+            return Response({"detail": "rows must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < rows <= MAX_PREVIEW_ROWS:
+            return Response({"detail": f"rows must be between 1 and {MAX_PREVIEW_ROWS}"},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-                blob = storage_bucket.blob(file_obj.name)
-                blob.upload_from_file(file_obj, content_type=file_obj.content_type)
-                uploaded_names.append(file_obj.name)
-                print("✅ Upload complete:", file_obj.name)
+        try:
+            preview = dataset_preview(storage_bucket, name, rows, mode)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if preview is None:
+            raise Http404("Dataset not found")
+        return Response(preview)
 
-            return Response({
-                "message": "Files uploaded successfully",
-                "files": uploaded_names
-            }, status=status.HTTP_201_CREATED)
 
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class DatasetMonitoringView(APIView):
+    """
+    Freshness, completeness and drift of a dataset, kept up to date as new
+    uploads and connector pulls arrive. ?history=N recent snapshots.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, name):
+        monitor = get_object_or_404(DatasetMonitor, dataset=name, dataset__in=accessible_datasets(request.user))
+        try:
+            history = min(max(int(request.query_params.get("history", 20)), 1), 200)
+        except ValueError:
+            return Response({"detail": "history must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(monitoring_report(monitor, history))
 
 
 # ---------------- DataSource Connection ----------------
+class PassThroughNegotiation(BaseContentNegotiation):
+    """
+    Leave the Accept header to the connector (Arrow, NDJSON, columnar...)
+    instead of answering 406 for media types DRF cannot render.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ConnectionCursorPagination(CursorPagination):
+    """Newest first; a cursor stays stable while connections are added or edited."""
+    ordering = "-updated_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
 class DataSourceConnectionViewSet(viewsets.ModelViewSet):
     """
     CRUD for cloud connections per user.
@@ -164,11 +268,98 @@ class DataSourceConnectionViewSet(viewsets.ModelViewSet):
     serializer_class = DataSourceConnectionSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "connector_id"  # 👈 Important line
+    pagination_class = ConnectionCursorPagination
 
     def get_queryset(self):
         # Only return connections for the logged-in user
         return DataSourceConnection.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        """
+        Paginated listing with conditional GET: the ETag covers the newest
+        updated_at, the row count (so deletions show) and the requested page,
+        so an unchanged list is answered with 304 from one aggregate query.
+        No Last-Modified: a deletion leaves the newest updated_at as it was,
+        so If-Modified-Since alone would get a stale 304.
+        """
+        state = self.get_queryset().aggregate(count=Count("pk"), latest=Max("updated_at"))
+        latest = state["latest"]
+        fingerprint = f"{request.user.pk}:{state['count']}:{latest.isoformat() if latest else ''}:{request.get_full_path()}"
+        etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        # Per-user data: browsers may keep it but must revalidate, shared caches must not
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    @action(detail=False, methods=["get"])
+    def health(self, request):
+        """
+        Check the local connector of every connection the user has saved.
+        Checks run concurrently, each with its own timeout (?timeout=seconds),
+        so the response waits for the slowest connector rather than all of them.
+        """
+        try:
+            timeout = float(request.query_params.get("timeout", HEALTH_TIMEOUT))
+        except ValueError:
+            return Response({"detail": "timeout must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        timeout = min(max(timeout, 0.5), MAX_HEALTH_TIMEOUT)
+
+        connections = list(self.get_queryset())
+        targets = {}
+        for c in connections:
+            token = c.api_token
+            if c.connector_url and token:
+                targets[c.connector_id] = (c.connector_url, token)
+        checks = check_many(targets, timeout)
+        results = [
+            {
+                "connector_id": c.connector_id,
+                "name": c.name,
+                **checks.get(c.connector_id, {"status": "unconfigured"}),
+            }
+            for c in connections
+        ]
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"], url_path="status")
+    def connector_status(self, request):
+        """
+        Latest polled status of every connector, as recorded by the
+        poll_connectors command. No connector is contacted here.
+        """
+        connections = list(self.get_queryset().values_list("connector_id", "name", "connector_url"))
+        statuses = latest_statuses([connector_id for connector_id, _, _ in connections])
+        results = [
+            {
+                "connector_id": connector_id,
+                "name": name,
+                **statuses.get(connector_id, {"status": "pending" if url else "unconfigured"}),
+            }
+            for connector_id, name, url in connections
+        ]
+        return Response({"results": results})
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, connector_id=None):
+        """Recent health checks and uptime of one connection's connector."""
+        connection = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 100)), 1), 1000)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        checks = connection.health_checks.values("status", "latency_ms", "checked_at")[:limit]
+        return Response({
+            "connector_id": connection.connector_id,
+            "current": latest_statuses([connection.connector_id]).get(connection.connector_id),
+            "uptime": {name: uptime(connection, window) for name, window in UPTIME_WINDOWS.items()},
+            "checks": list(checks),
+        })
+
     def destroy(self, request, *args, **kwargs):
         """
         Delete a connection by connector_id (UUID).
@@ -177,18 +368,104 @@ class DataSourceConnectionViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response({"detail": "Connection deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=["post"], content_negotiation_class=PassThroughNegotiation)
+    def query(self, request, connector_id=None):
+        """
+        Proxy a query to this connection's local connector and stream the
+        answer back as it arrives, so the browser never sees the connector
+        token and large results never sit whole in backend memory.
+        """
+        connection = self.get_object()
+        token = connection.api_token
+        if not connection.connector_url or not token:
+            return Response({"detail": "No local connector configured for this connection."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        headers = proxy_request_headers(request.headers)
+        try:
+            upstream = connector_request(
+                "POST", connection.connector_url, token, "/query",
+                timeout=PROXY_TIMEOUT, data=request.body, headers=headers, stream=True,
+            )
+        except requests.Timeout as e:
+            return Response({"detail": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except requests.RequestException as e:
+            return Response({"detail": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        response = StreamingHttpResponse(
+            stream_body(upstream),
+            status=upstream.status_code,
+            content_type=upstream.headers.get("Content-Type", "application/json"),
+        )
+        for name in PROXY_RESPONSE_HEADERS:
+            if name in upstream.headers:
+                response[name] = upstream.headers[name]
+        return response
+
     @action(detail=True, methods=["post"])
-    def test_connection(self, request, pk=None):
+    def pull(self, request, connector_id=None):
         """
-        Optional: Test if the connection details work (try connecting to DB or API)
+        Run a query through this connection's local connector and record the
+        result as a new snapshot of `dataset` for monitoring. Only summaries
+        are kept, never the rows.
         """
         connection = self.get_object()
-        data = {
-            "connector_id": connection.connector_id,
-            "name": connection.name,
-            "host": connection.host,
-            "port": connection.port,
-            "username": connection.username,
-            "database": connection.database,
-        }
-        return Response({"detail": "Connection fetched successfully", "connection": data})
\ No newline at end of file
+        dataset = (request.data.get("dataset") or "").strip()
+        query = (request.data.get("query") or "").strip()
+        if not dataset or not query:
+            return Response({"detail": "dataset and query are required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            snapshot = pull_from_connector(connection, dataset, query)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except requests.Timeout as e:
+            return Response({"detail": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except (requests.RequestException, RuntimeError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response({
+            "dataset": dataset,
+            "row_count": snapshot.row_count,
+            "completeness": snapshot.completeness,
+            "drift_score": snapshot.drift_score,
+            "drift": snapshot.drift,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def test_connection(self, request, connector_id=None):
+        """
+        Connect to the database with the stored credentials and run SELECT 1,
+        reporting connect and total latency. Results are cached briefly;
+        ?refresh=1 forces a new attempt.
+        """
+        connection = self.get_object()
+        refresh = request.query_params.get("refresh") in ("1", "true")
+        result = check_connections([connection], refresh)[connection.connector_id]
+        return Response({"connector_id": connection.connector_id, "name": connection.name, **result})
+
+    @action(detail=False, methods=["post"], url_path="test")
+    def test_connections(self, request):
+        """
+        Test many connections at once (body: {"connector_ids": [...]}, default
+        all of the user's). Attempts run in parallel on a bounded pool and
+        recent results are served from cache.
+        """
+        connections = self.get_queryset()
+        connector_ids = request.data.get("connector_ids")
+        if connector_ids is not None:
+            if not isinstance(connector_ids, list):
+                return Response({"detail": "connector_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+            connections = connections.filter(connector_id__in=connector_ids)
+        connections = list(connections[:MAX_BULK_TESTS + 1])
+        if len(connections) > MAX_BULK_TESTS:
+            return Response({"detail": f"At most {MAX_BULK_TESTS} connections can be tested at once"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        refresh = request.query_params.get("refresh") in ("1", "true")
+        checks = check_connections(connections, refresh)
+        results = [
+            {"connector_id": c.connector_id, "name": c.name, **checks[c.connector_id]}
+            for c in connections
+        ]
+        return Response({"results": results})
\ No newline at end of file
@@ -73,10 +73,17 @@ CORS_ALLOW_CREDENTIALS = True  # allow cookies / JWT in cross-origin requests
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "X-API-TOKEN",
+    "X-DATA-SOURCE",
     "authorization",
     "content-type",
 ]
 
+# Connector headers relayed by the query proxy that the frontend reads
+CORS_EXPOSE_HEADERS = [
+    "X-Cache",
+    "X-Next-Page-Token",
+]
+
 # CSRF trusted origins (no trailing slash!)
 CSRF_TRUSTED_ORIGINS = [
     "https://datakart-production.up.railway.app",
@@ -4,17 +4,54 @@ import secrets
 import socket
 import mysql.connector
 import psycopg2
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from getpass import getpass
 from flask_cors import CORS
 from pyngrok import ngrok
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # Arrow output is optional
+    pyarrow = None
+try:
+    import zstandard
+except ImportError:  # gzip only
+    zstandard = None
+try:
+    import uvicorn
+except ImportError:  # falls back to the Flask development server
+    uvicorn = None
 import threading
 import time
 import contextlib
+import collections
+import uuid
+import base64
+import datetime
+import decimal
+import json
+import re
+import hashlib
+import hmac
+import binascii
+import io
+import csv
+import itertools
+import functools
+import zlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 CORS(app)
 
+# ==== Utility: Integer settings from environment ====
+def env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
 # ==== Utility: Find a free port ====
 def get_free_port(start=5000, end=6000):
     for port in range(start, end):
@@ -34,8 +71,10 @@ def get_local_ip():
     return ip
 
 # ==== Setup Config ====
-def setup_config():
-    print("\n=== Local Database Connector ===")
+SOURCE_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def setup_source():
     db_type = input("Enter DB type (mysql/postgres): ").strip().lower()
 
     if db_type not in ["mysql", "postgres"]:
@@ -50,41 +89,1278 @@ def setup_config():
     password = getpass("Enter password: ").strip()
     database = input("Enter database name: ").strip()
 
+    return {
+        "db_type": db_type,
+        "host": host,
+        "port": port,
+        "user": user,
+        "password": password,
+        "database": database,
+    }
+
+
+def setup_config():
+    print("\n=== Local Database Connector ===")
+    sources = {}
+    while True:
+        default_name = "default" if not sources else f"source{len(sources) + 1}"
+        name = input(f"Enter a name for this data source (default: {default_name}): ").strip() or default_name
+        if not SOURCE_NAME_RE.match(name) or name in sources:
+            print("❌ Names must be unique and use only letters, digits, '-' and '_'.")
+            continue
+        sources[name] = setup_source()
+        if input("Add another data source? (y/N): ").strip().lower() != "y":
+            break
+
     token = secrets.token_hex(16)
     local_port = get_free_port()
     ip = get_local_ip()
     print(f"\n🔑 Your API Token (keep this secret!): {token}")
     print(f"🌐 Connector starting locally at: http://{ip}:{local_port}")
+    print(f"🗄️ Data sources: {', '.join(sources)} (first is the default; pick others with "
+          f"/sources/<name>/... or the X-DATA-SOURCE header)")
     print("Keep this window open while your web app connects.\n")
 
     return {
-        "db_type": db_type,
-        "host": host,
-        "port": port,
-        "user": user,
-        "password": password,
-        "database": database,
+        "sources": sources,
         "token": token,
         "local_port": local_port,
     }
 
 config = setup_config()
 
+# ==== Connection Pool ====
+POOL_MIN_SIZE = env_int("CONNECTOR_POOL_MIN", 1)
+POOL_MAX_SIZE = max(env_int("CONNECTOR_POOL_MAX", 10), 1)
+POOL_MAX_AGE = env_int("CONNECTOR_POOL_MAX_AGE", 1800)      # seconds before a connection is recycled
+POOL_TIMEOUT = env_int("CONNECTOR_POOL_TIMEOUT", 30)        # seconds to wait for a free connection
+POOL_CHECK_IDLE = env_int("CONNECTOR_POOL_CHECK_IDLE", 30)  # ping connections idle longer than this
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class InvalidRequest(Exception):
+    """Client-side mistake in a request payload, reported as a 400."""
+
+
+class PooledConnection:
+    """A raw DB-API connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, conn, source=None):
+        self.conn = conn
+        self.source = source
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Prepared statements live as long as the session, so they are cached per connection
+        self.statements = collections.OrderedDict()
+        self.session = {}  # session variables this connector has changed
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of database connections.
+    Connections are health-checked after sitting idle, recycled once they
+    reach max_age and rolled back on release so no transaction (or MySQL
+    snapshot) leaks into the next checkout.
+    """
+
+    def __init__(self, connect, ping, min_size=1, max_size=10, max_age=1800, timeout=30, check_idle=30,
+                 source=None):
+        self._connect = connect
+        self.source = source
+        self._ping = ping
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.check_idle = check_idle
+
+        self._idle = collections.deque()
+        self._cond = threading.Condition()
+        self._size = 0      # open connections, idle + in use
+        self._in_use = 0
+        self._waiting = 0
+        self._counters = collections.Counter()
+
+    def _open(self):
+        pc = PooledConnection(self._connect(), self.source)
+        with self._cond:
+            self._counters["created"] += 1
+        return pc
+
+    def _close(self, pc):
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, pc):
+        return self.max_age > 0 and time.monotonic() - pc.created_at > self.max_age
+
+    def _healthy(self, pc):
+        if time.monotonic() - pc.last_used < self.check_idle:
+            return True
+        try:
+            return self._ping(pc.conn)
+        except Exception:
+            return False
+
+    def warm(self):
+        """Open connections up to min_size."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pc = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pc)
+                self._cond.notify()
+
+    def acquire(self):
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    pc = self._idle.pop()  # LIFO keeps the hottest connections in use
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pc = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            self._counters["checkouts"] += 1
+
+        # Connect / ping outside the lock so slow handshakes don't block other threads
+        try:
+            if pc is not None and (self._expired(pc) or not self._healthy(pc)):
+                with self._cond:
+                    self._counters["recycled" if self._expired(pc) else "discarded"] += 1
+                self._close(pc)
+                pc = None
+            if pc is None:
+                pc = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        if self.source is not None:
+            QUERY_PHASE_SECONDS.observe(time.perf_counter() - started, source=self.source.name, phase="connect")
+        return pc
+
+    def release(self, pc, discard=False):
+        if not discard:
+            try:
+                pc.conn.rollback()
+            except Exception:
+                discard = True
+        recycle = not discard and self._expired(pc)
+        if discard or recycle:
+            self._close(pc)
+        else:
+            pc.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if discard or recycle:
+                self._size -= 1
+                self._counters["recycled" if recycle else "discarded"] += 1
+            else:
+                self._idle.append(pc)
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self):
+        pc = self.acquire()
+        try:
+            yield pc
+        finally:
+            self.release(pc)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "max_age": self.max_age,
+                **{k: self._counters[k] for k in ("created", "checkouts", "recycled", "discarded", "timeouts")},
+            }
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._size -= len(idle)
+        for pc in idle:
+            self._close(pc)
+
+
+class UnknownSource(Exception):
+    pass
+
+
+class DataSource:
+    """One named database served by this connector, with its own pool."""
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.db_type = settings["db_type"]
+        self.database = settings["database"]
+        self.pool = ConnectionPool(
+            self.open_connection, self.ping_connection,
+            min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, max_age=POOL_MAX_AGE,
+            timeout=POOL_TIMEOUT, check_idle=POOL_CHECK_IDLE, source=self,
+        )
+        self.schema = None  # SchemaCatalog, attached once that section is defined
+
+    def open_connection(self):
+        settings = self.settings
+        if self.db_type == "mysql":
+            return mysql.connector.connect(
+                host=settings["host"], port=settings["port"],
+                user=settings["user"], password=settings["password"],
+                database=settings["database"]
+            )
+        return psycopg2.connect(
+            host=settings["host"], port=settings["port"],
+            user=settings["user"], password=settings["password"],
+            dbname=settings["database"]
+        )
+
+    def ping_connection(self, conn):
+        if self.db_type == "mysql":
+            return conn.is_connected()
+        if conn.closed:
+            return False
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+
+
+sources = {name: DataSource(name, settings) for name, settings in config["sources"].items()}
+default_source = next(iter(sources.values()))
+
+
+def get_source(name=None):
+    if not name:
+        return default_source
+    source = sources.get(name)
+    if source is None:
+        raise UnknownSource(f"Unknown data source '{name}'")
+    return source
+
+# ==== Prepared Statements ====
+PREPARED_CACHE_SIZE = env_int("CONNECTOR_PREPARED_CACHE", 64)   # statements per connection, 0 disables
+_PLACEHOLDER_RE = re.compile(r"%%|%s")
+
+
+def parse_params(data):
+    """Positional parameters for %s placeholders, or None for a raw SQL string."""
+    params = data.get("params")
+    if params is None:
+        return None
+    if not isinstance(params, list):
+        raise InvalidRequest("params must be a list")
+    return params
+
+
+def _cache_statement(pc, key, create, drop):
+    """LRU lookup in the connection's statement cache; `drop` disposes of evicted entries."""
+    statement = pc.statements.get(key)
+    if statement is not None:
+        pc.statements.move_to_end(key)
+        return statement
+    statement = create()
+    pc.statements[key] = statement
+    while len(pc.statements) > PREPARED_CACHE_SIZE:
+        _, evicted = pc.statements.popitem(last=False)
+        with contextlib.suppress(Exception):
+            drop(evicted)
+    return statement
+
+
+def _prepare_postgres(pc, query):
+    def create():
+        counter = iter(range(1, len(query) + 1))
+        body = _PLACEHOLDER_RE.sub(lambda m: "%" if m.group() == "%%" else f"${next(counter)}", query)
+        name = "datakart_" + hashlib.sha1(query.encode()).hexdigest()[:16]
+        with pc.conn.cursor() as cursor:
+            cursor.execute(f"PREPARE {name} AS {body}")
+        return name
+
+    def drop(name):
+        with pc.conn.cursor() as cursor:
+            cursor.execute(f"DEALLOCATE {name}")
+
+    return _cache_statement(pc, query, create, drop)
+
+
+def _prepare_mysql(pc, query):
+    """
+    (cursor, statement) for `query`. A prepared cursor keeps its server-side
+    statement until it is closed, but re-prepares whenever execute() gets a
+    different string object, so callers must always pass the cached one.
+    """
+    def create():
+        # The prepared cursor never interpolates, so "%%" has to be unescaped here as for PREPARE
+        body = _PLACEHOLDER_RE.sub(lambda m: "%" if m.group() == "%%" else "?", query)
+        return pc.conn.cursor(prepared=True), body
+
+    return _cache_statement(pc, query, create, lambda statement: statement[0].close())
+
+
+@contextlib.contextmanager
+def statement_cursor(pc, query, params=None):
+    """
+    Yield a cursor on which `query` has been executed. Parameterized
+    statements are prepared once per connection - PREPARE/EXECUTE on
+    Postgres, a prepared cursor on MySQL - so repeats skip parse and plan.
+    """
+    if params is None or PREPARED_CACHE_SIZE <= 0:
+        cursor = pc.conn.cursor()
+        try:
+            with timed(pc.source, "execute"):
+                cursor.execute(query, params)
+            yield cursor
+        finally:
+            cursor.close()
+    elif pc.source.db_type == "mysql":
+        with timed(pc.source, "execute"):
+            cursor, statement = _prepare_mysql(pc, query)
+            cursor.execute(statement, params)
+        yield cursor  # stays open in the statement cache
+    else:
+        cursor = pc.conn.cursor()
+        try:
+            with timed(pc.source, "execute"):
+                name = _prepare_postgres(pc, query)
+                if params:
+                    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+                else:
+                    cursor.execute(f"EXECUTE {name}")
+            yield cursor
+        finally:
+            cursor.close()
+
+# ==== Statement Timeouts ====
+STATEMENT_TIMEOUT_MS = env_int("CONNECTOR_STATEMENT_TIMEOUT_MS", 0)   # 0 leaves the server default
+
+
+def statement_timeout_ms(data):
+    try:
+        timeout_ms = int(data.get("timeout_ms", STATEMENT_TIMEOUT_MS) or 0)
+    except (TypeError, ValueError):
+        raise InvalidRequest("timeout_ms must be an integer")
+    if timeout_ms < 0:
+        raise InvalidRequest("timeout_ms cannot be negative")
+    return timeout_ms
+
+
+def apply_statement_timeout(pc, timeout_ms):
+    """
+    Have the database abort statements running longer than timeout_ms.
+    Postgres gets SET LOCAL, which ends with the current transaction.
+    MySQL gets the session max_execution_time (SELECTs only), which is
+    tracked on the connection so it is only sent when it changes.
+    """
+    if pc.source.db_type == "mysql":
+        if pc.session.get("max_execution_time", 0) == timeout_ms:
+            return
+        cursor = pc.conn.cursor()
+        try:
+            cursor.execute("SET SESSION max_execution_time = %s", (timeout_ms,))
+        finally:
+            cursor.close()
+        pc.session["max_execution_time"] = timeout_ms
+    elif timeout_ms:
+        with pc.conn.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s", (timeout_ms,))
+
+
+def is_timeout_error(error):
+    return getattr(error, "pgcode", None) == "57014" or getattr(error, "errno", None) == 3024
+
+# ==== Result Formats ====
+ROWS_MIMETYPE = "application/json"
+COLUMNAR_MIMETYPE = "application/vnd.datakart.columnar+json"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+RESULT_FORMATS = {"rows": ROWS_MIMETYPE, "columnar": COLUMNAR_MIMETYPE, "arrow": ARROW_MIMETYPE}
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _b64(value):
+    return base64.b64encode(bytes(value)).decode("ascii")
+
+
+# (python types, type name, JSON encoder) - bool before int and datetime before date,
+# because of subclassing. None means the value is already JSON-native.
+VALUE_ENCODERS = [
+    (bool, "bool", None),
+    (int, "int", None),
+    (float, "float", None),
+    (decimal.Decimal, "decimal", str),
+    (datetime.datetime, "datetime", _iso),
+    (datetime.date, "date", _iso),
+    (datetime.time, "time", _iso),
+    (datetime.timedelta, "interval", lambda v: v.total_seconds()),
+    ((bytes, bytearray, memoryview), "binary", _b64),
+    (str, "string", None),
+]
+
+
+def column_encoder(values):
+    """Pick a type name and encoder for a column from its first non-null value."""
+    sample = next((v for v in values if v is not None), None)
+    if sample is None:
+        return "null", None
+    for types, name, encode in VALUE_ENCODERS:
+        if isinstance(sample, types):
+            return name, encode
+    return "string", str
+
+
+def encode_columnar(columns, rows):
+    """Column names plus one typed array per column, instead of a dict per row."""
+    data = list(zip(*rows)) if rows else [() for _ in columns]
+    types = []
+    for i, values in enumerate(data):
+        name, encode = column_encoder(values)
+        if encode is not None:
+            try:
+                data[i] = [None if v is None else encode(v) for v in values]
+            except Exception:  # mixed types in one column
+                name = "string"
+                data[i] = [None if v is None else str(v) for v in values]
+        types.append(name)
+    return {"columns": columns, "types": types, "data": data, "row_count": len(rows)}
+
+
+def dumps_compact(obj):
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+def arrow_column(values):
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return pyarrow.array([None if v is None else str(v) for v in values], type=pyarrow.string())
+
+
+def encode_arrow(columns, rows):
+    data = list(zip(*rows)) if rows else [() for _ in columns]
+    table = pyarrow.Table.from_arrays([arrow_column(list(v)) for v in data], names=columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def result_format(data):
+    """Explicit "format" in the payload wins, otherwise negotiate on Accept."""
+    fmt = data.get("format")
+    if fmt:
+        if fmt not in RESULT_FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'")
+        if fmt == "arrow" and pyarrow is None:
+            raise ValueError("Arrow format requires pyarrow on the connector")
+        return fmt
+    offered = [ROWS_MIMETYPE, COLUMNAR_MIMETYPE] + ([ARROW_MIMETYPE] if pyarrow else [])
+    best = request.accept_mimetypes.best_match(offered, default=ROWS_MIMETYPE)
+    return next(name for name, mimetype in RESULT_FORMATS.items() if mimetype == best)
+
+
+def render_rows(columns, rows, fmt):
+    if fmt == "arrow":
+        return Response(encode_arrow(columns, rows), mimetype=ARROW_MIMETYPE)
+    if fmt == "columnar":
+        return Response(dumps_compact(encode_columnar(columns, rows)), mimetype=COLUMNAR_MIMETYPE)
+    return jsonify([dict(zip(columns, r)) for r in rows])
+
+# ==== Streaming Results ====
+FETCH_SIZE = max(env_int("CONNECTOR_FETCH_SIZE", 1000), 1)
+
+
+def open_stream_cursor(pc):
+    """Server-side cursor: a named cursor on Postgres, an unbuffered one on MySQL."""
+    if pc.source.db_type == "mysql":
+        return pc.conn.cursor(buffered=False)
+    cursor = pc.conn.cursor(name=f"datakart_{uuid.uuid4().hex}")
+    cursor.itersize = FETCH_SIZE
+    return cursor
+
+
+def stream_query(source, query, fmt="rows", params=None, timeout_ms=0):
+    """
+    Run a SELECT on a server-side cursor and stream the rows as NDJSON.
+    The pooled connection stays checked out until the response is closed,
+    and only FETCH_SIZE rows are held in memory at any time. In columnar
+    format every line is one columnar batch instead of one row.
+    """
+    pool = source.pool
+    pc = pool.acquire()
+    cursor = None
+    try:
+        apply_statement_timeout(pc, timeout_ms)
+        cursor = open_stream_cursor(pc)
+        with timed(source, "execute"):
+            cursor.execute(query, params)
+        # Named cursors only know their description after the first fetch
+        with timed(source, "fetch"):
+            batch = cursor.fetchmany(FETCH_SIZE)
+        columns = [desc[0] for desc in cursor.description]
+    except Exception:
+        if cursor is not None:
+            with contextlib.suppress(Exception):
+                cursor.close()
+        pool.release(pc)
+        raise
+
+    def generate():
+        rows = batch
+        try:
+            while rows:
+                with timed(source, "serialize"):
+                    if fmt == "columnar":
+                        chunk = dumps_compact(encode_columnar(columns, rows)) + "\n"
+                    else:
+                        chunk = "".join(
+                            app.json.dumps(dict(zip(columns, r)), sort_keys=False) + "\n" for r in rows
+                        )
+                ROWS_RETURNED.inc(len(rows), source=source.name)
+                yield chunk
+                with timed(source, "fetch"):
+                    rows = cursor.fetchmany(FETCH_SIZE)
+        except Exception as e:
+            QUERY_ERRORS.inc(source=source.name)
+            yield app.json.dumps({"error": str(e)}) + "\n"
+
+    released = threading.Event()
+
+    def close():
+        if released.is_set():
+            return
+        released.set()
+        with contextlib.suppress(Exception):
+            cursor.close()
+        # An abandoned MySQL unbuffered cursor leaves unread rows behind;
+        # the rollback in release() then fails and the connection is dropped.
+        pool.release(pc)
+
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.call_on_close(close)
+    return response
+
+
+def wants_stream(data):
+    if data.get("stream"):
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+# ==== Keyset Pagination ====
+MAX_PAGE_SIZE = env_int("CONNECTOR_MAX_PAGE_SIZE", 10000)
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+
+# Inverse of VALUE_ENCODERS, so key values keep their type inside page tokens
+VALUE_DECODERS = {
+    "decimal": decimal.Decimal,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "interval": lambda v: datetime.timedelta(seconds=v),
+    "binary": base64.b64decode,
+}
+
+
+def quote_identifier(name, db_type):
+    if not isinstance(name, str) or not IDENTIFIER_RE.match(name):
+        raise InvalidRequest(f"Invalid column name '{name}'")
+    return f"`{name}`" if db_type == "mysql" else f'"{name}"'
+
+
+def page_fingerprint(source, query, order_by, descending, params=None):
+    # Bound params are part of the query: a token minted for other values would skip rows
+    key = json.dumps([source.name, query, order_by, descending, params], default=str)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _sign(payload):
+    digest = hmac.new(config["token"].encode(), payload.encode(), hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def encode_page_token(fingerprint, key_values):
+    types, values = [], []
+    for value in key_values:
+        name, encode = column_encoder([value])
+        types.append(name)
+        values.append(value if encode is None or value is None else encode(value))
+    payload = base64.urlsafe_b64encode(dumps_compact({"f": fingerprint, "t": types, "k": values}).encode()).decode()
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_page_token(token, fingerprint):
+    try:
+        payload, signature = token.rsplit(".", 1)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError
+        body = json.loads(base64.urlsafe_b64decode(payload))
+    except (ValueError, TypeError, AttributeError, binascii.Error):
+        raise InvalidRequest("Invalid page token")
+    if body.get("f") != fingerprint:
+        raise InvalidRequest("Page token does not belong to this query")
+    return [
+        None if v is None else VALUE_DECODERS.get(t, lambda x: x)(v)
+        for t, v in zip(body["t"], body["k"])
+    ]
+
+
+def keyset_sql(db_type, query, order_by, descending, after, limit, params=None):
+    """
+    Wrap a SELECT so it resumes after the last seen key. The WHERE on the
+    ordering columns is pushed into the inner query by the planner, so with
+    an index on them each page is a seek rather than an OFFSET scan.
+    """
+    columns = [quote_identifier(c, db_type) for c in order_by]
+    direction = "DESC" if descending else "ASC"
+    inner = query.rstrip().rstrip(";")
+    after = list(after or [])
+    if after and params is None:
+        inner = inner.replace("%", "%%")  # the driver interpolates the whole statement
+    sql = f"SELECT * FROM ({inner}) AS _page"
+    if after:
+        op = "<" if descending else ">"
+        sql += f" WHERE ({', '.join(columns)}) {op} ({', '.join(['%s'] * len(after))})"
+    sql += f" ORDER BY {', '.join(f'{c} {direction}' for c in columns)} LIMIT {int(limit)}"
+    if params is None and not after:
+        return sql, None
+    return sql, list(params or []) + after
+
+
+def fetch_page(pc, query, data):
+    """
+    Fetch one page for a paginated /query. Returns (columns, rows, next_token);
+    next_token is None on the last page.
+    """
+    order_by = data.get("order_by")
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    if not order_by:
+        raise InvalidRequest("order_by is required for paginated queries")
+    try:
+        page_size = int(data.get("page_size"))
+    except (TypeError, ValueError):
+        raise InvalidRequest("page_size must be an integer")
+    if not 0 < page_size <= MAX_PAGE_SIZE:
+        raise InvalidRequest(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    descending = bool(data.get("descending"))
+
+    params = parse_params(data)
+    fingerprint = page_fingerprint(pc.source, query, order_by, descending, params)
+    token = data.get("page_token")
+    after = decode_page_token(token, fingerprint) if token else None
+    if after is not None and len(after) != len(order_by):
+        raise InvalidRequest("Page token does not belong to this query")
+
+    sql, params = keyset_sql(pc.source.db_type, query, order_by, descending, after, page_size + 1, params)
+    with statement_cursor(pc, sql, params) as cursor, timed(pc.source, "fetch"):
+        rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+
+    next_token = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        missing = [c for c in order_by if c not in columns]
+        if missing:
+            raise InvalidRequest(f"order_by columns not in result: {', '.join(missing)}")
+        last = rows[-1]
+        next_token = encode_page_token(fingerprint, [last[columns.index(c)] for c in order_by])
+    return columns, rows, next_token
+
+
+def render_page(columns, rows, fmt, next_token):
+    if fmt == "arrow":
+        response = render_rows(columns, rows, fmt)
+    elif fmt == "columnar":
+        body = encode_columnar(columns, rows)
+        body["next_page_token"] = next_token
+        response = Response(dumps_compact(body), mimetype=COLUMNAR_MIMETYPE)
+    else:
+        response = jsonify({"rows": [dict(zip(columns, r)) for r in rows], "next_page_token": next_token})
+    if next_token:
+        response.headers["X-Next-Page-Token"] = next_token
+    return response
+
+# ==== Result Cache ====
+CACHE_TTL = env_int("CONNECTOR_CACHE_TTL", 60)                       # seconds, 0 disables the cache
+CACHE_MAX_BYTES = env_int("CONNECTOR_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Whitespace outside of quoted literals/identifiers is not significant
+_NORMALIZE_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|\s+""")
+_TABLE = r"""((?:[`"]?[\w$]+[`"]?\.)*[`"]?[\w$]+[`"]?)"""
+_READ_TABLES_RE = re.compile(r"\b(?:from|join)\s+" + _TABLE, re.IGNORECASE)
+_WRITE_TABLES_RE = re.compile(
+    r"\b(?:insert\s+(?:ignore\s+)?into|replace\s+into|merge\s+into|update|delete\s+from|"
+    r"truncate(?:\s+table)?|(?:alter|drop|create)\s+table(?:\s+if\s+(?:not\s+)?exists)?)\s+" + _TABLE,
+    re.IGNORECASE,
+)
+
+
+def normalize_query(query):
+    query = _NORMALIZE_RE.sub(lambda m: m.group(1) or " ", query).strip()
+    return query.rstrip(";").rstrip()
+
+
+def _table_names(regex, query):
+    # Schema qualifiers are dropped: invalidating a same-named table too often is safe
+    return {m.split(".")[-1].strip('`"').lower() for m in regex.findall(query)}
+
+
+def read_tables(query):
+    return _table_names(_READ_TABLES_RE, query)
+
+
+def written_tables(query):
+    return _table_names(_WRITE_TABLES_RE, query)
+
+
+class CachedResponse:
+    __slots__ = ("source", "body", "mimetype", "headers", "tables", "expires_at", "size")
+
+    def __init__(self, source, body, mimetype, headers, tables, expires_at):
+        self.source = source
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        self.tables = tables
+        self.expires_at = expires_at
+        self.size = len(body)
+
+
+class ResultCache:
+    """
+    In-process cache of rendered SELECT responses with a TTL and an LRU
+    bounded by total body size. Writes invalidate entries reading the tables
+    they touch; a write whose tables cannot be parsed clears everything.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so results computed before a write are not stored after it
+        self.generation = 0
+        self._counters = collections.Counter()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def key(source, query, fmt, data):
+        extras = {k: data.get(k) for k in ("params", "page_size", "order_by", "descending", "page_token")}
+        return dumps_compact([source.name, normalize_query(query), fmt, extras])
+
+    def _pop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._pop(key)
+                self._counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.headers.extend(entry.headers)
+        return response
+
+    def put(self, source, key, response, tables, generation):
+        if response.status_code != 200:
+            return
+        body = response.get_data()
+        if len(body) > self.max_bytes // 4:  # one huge result must not flush the whole cache
+            return
+        headers = [(k, v) for k, v in response.headers.items() if k.startswith("X-")]
+        entry = CachedResponse(source.name, body, response.mimetype, headers, tables, time.monotonic() + self.ttl)
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def invalidate(self, source, tables=None):
+        """Drop the source's entries reading any of `tables`; all of them when tables is empty/None."""
+        with self._lock:
+            self.generation += 1
+            stale = [
+                k for k, e in self._entries.items()
+                if e.source == source.name and (not tables or e.tables & tables)
+            ]
+            for k in stale:
+                self._pop(k)
+            self._counters["invalidated"] += len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                **{k: self._counters[k] for k in ("hits", "misses", "expired", "evictions", "invalidated")},
+            }
+
+
+result_cache = ResultCache(CACHE_TTL, CACHE_MAX_BYTES)
+
+# ==== Metrics ====
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A labelled metric family rendered in the Prometheus text exposition format."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{_format_labels(key)} {_format_number(value)}" for name, key, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]  # per-bucket counts, then sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in sorted(self._values.items())]
+        samples = []
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key + (("le", _format_number(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", key, counts[-1]))
+            samples.append((f"{self.name}_count", key, cumulative))
+        return samples
+
+
+QUERY_PHASE_SECONDS = Histogram(
+    "datakart_query_phase_seconds",
+    "Time spent per query phase: connect (pool checkout), execute, fetch and serialize.",
+    ("source", "phase"),
+)
+REQUEST_SECONDS = Histogram(
+    "datakart_request_duration_seconds", "Time to produce a response, by endpoint.", ("endpoint",)
+)
+REQUESTS_TOTAL = Counter("datakart_requests_total", "Requests handled, by endpoint and status.", ("endpoint", "status"))
+REQUEST_ERRORS = Counter(
+    "datakart_request_errors_total", "Requests answered with a 4xx or 5xx status.", ("endpoint", "status")
+)
+QUERY_ERRORS = Counter(
+    "datakart_query_errors_total",
+    "Statements that failed inside an otherwise successful response (batch items, streams, jobs).",
+    ("source",),
+)
+ROWS_RETURNED = Counter("datakart_rows_returned_total", "Result rows sent to clients.", ("source",))
+BYTES_RETURNED = Counter(
+    "datakart_response_bytes_total", "Response body bytes sent, after compression.", ("endpoint",)
+)
+IN_FLIGHT = Gauge("datakart_requests_in_flight", "Requests currently being handled.")
+METRICS = [
+    QUERY_PHASE_SECONDS, REQUEST_SECONDS, REQUESTS_TOTAL, REQUEST_ERRORS,
+    QUERY_ERRORS, ROWS_RETURNED, BYTES_RETURNED, IN_FLIGHT,
+]
+
+
+@contextlib.contextmanager
+def timed(source, phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        QUERY_PHASE_SECONDS.observe(time.perf_counter() - started, source=source.name, phase=phase)
+
+
+def count_bytes(chunks, endpoint):
+    """Pass a streamed body through, counting its bytes as they are sent."""
+    try:
+        for chunk in chunks:
+            BYTES_RETURNED.inc(len(chunk.encode("utf-8") if isinstance(chunk, str) else chunk), endpoint=endpoint)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def pool_metrics():
+    """Gauges read from each source's pool and the result cache at scrape time."""
+    families = [
+        ("datakart_pool_connections", "gauge", "Open pooled connections by state.", []),
+        ("datakart_pool_max_size", "gauge", "Upper bound on pooled connections.", []),
+        ("datakart_pool_utilization", "gauge", "Fraction of max_size currently checked out.", []),
+        ("datakart_pool_waiting", "gauge", "Threads waiting for a connection.", []),
+        ("datakart_pool_checkouts_total", "counter", "Connections handed out by the pool.", []),
+        ("datakart_pool_timeouts_total", "counter", "Checkouts that gave up waiting.", []),
+    ]
+    for name, source in sources.items():
+        stats = source.pool.stats()
+        labels = (("source", name),)
+        families[0][3].extend([
+            (labels + (("state", "in_use"),), stats["in_use"]),
+            (labels + (("state", "idle"),), stats["idle"]),
+        ])
+        families[1][3].append((labels, stats["max_size"]))
+        families[2][3].append((labels, stats["in_use"] / stats["max_size"] if stats["max_size"] else 0.0))
+        families[3][3].append((labels, stats["waiting"]))
+        families[4][3].append((labels, stats["checkouts"]))
+        families[5][3].append((labels, stats["timeouts"]))
+
+    cache = result_cache.stats()
+    families.extend([
+        ("datakart_cache_hits_total", "counter", "Result cache hits.", [((), cache["hits"])]),
+        ("datakart_cache_misses_total", "counter", "Result cache misses.", [((), cache["misses"])]),
+        ("datakart_cache_bytes", "gauge", "Bytes held by the result cache.", [((), cache["bytes"])]),
+    ])
+
+    lines = []
+    for name, kind, help_text, samples in families:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_format_labels(labels)} {_format_number(value)}" for labels, value in samples]
+    return lines
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += pool_metrics()
+    return "\n".join(lines) + "\n"
+
+
+# Registered ahead of the token check so rejected requests are counted, and
+# ahead of compression so its after_request hook (run in reverse order) sees
+# the compressed body.
+@app.before_request
+def start_request_metrics():
+    IN_FLIGHT.inc()
+    g.metrics_started = time.perf_counter()
+
+
+def _finish_request_metrics(started, endpoint, status):
+    IN_FLIGHT.dec()
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    REQUESTS_TOTAL.inc(endpoint=endpoint, status=status)
+    if status >= 400:
+        REQUEST_ERRORS.inc(endpoint=endpoint, status=status)
+
+
+@app.after_request
+def record_response_metrics(response):
+    endpoint = request.endpoint or "unmatched"
+    g.metrics_status = response.status_code
+    if response.is_streamed:
+        response.response = count_bytes(response.response, endpoint)
+        # A streamed body is produced after teardown, so the request ends when the server closes it
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            response.call_on_close(functools.partial(_finish_request_metrics, started, endpoint, response.status_code))
+    else:
+        BYTES_RETURNED.inc(response.calculate_content_length() or 0, endpoint=endpoint)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        _finish_request_metrics(started, request.endpoint or "unmatched", g.get("metrics_status", 500))
+
+# ==== Source Routing ====
+def route(rule, **options):
+    """
+    Register a view at `rule` for the default source (or the one named in
+    the X-DATA-SOURCE header) and at /sources/<source>`rule` for a named one.
+    """
+    def decorator(view):
+        app.add_url_rule(rule, view_func=view, **options)
+        app.add_url_rule(f"/sources/<source>{rule}", view_func=view, **options)
+        return view
+    return decorator
+
+
+@app.url_value_preprocessor
+def pull_source(endpoint, values):
+    g.source_name = values.pop("source", None) if values else None
+
 # ==== Security Middleware ====
 @app.before_request
 def verify_token():
-    if request.path != "/health":
+    if request.endpoint != "health" or wants_verbose_health():
         token = request.headers.get("X-API-TOKEN")
         if token != config["token"]:
             return jsonify({"error": "Unauthorized"}), 401
+    try:
+        g.source = get_source(g.get("source_name") or request.headers.get("X-DATA-SOURCE"))
+    except UnknownSource as e:
+        return jsonify({"error": str(e)}), 404
+
+# ==== Response Compression ====
+COMPRESS_MIN_SIZE = env_int("CONNECTOR_COMPRESS_MIN_SIZE", 1024)   # bytes, buffered responses only
+GZIP_LEVEL = env_int("CONNECTOR_GZIP_LEVEL", 6)
+ZSTD_LEVEL = env_int("CONNECTOR_ZSTD_LEVEL", 3)
+
+
+class ChunkCompressor:
+    """Compresses a body piece by piece, flushing after each chunk so streamed rows are not held back."""
+
+    def __init__(self, encoding):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk) + self._obj.flush(self._sync)
+
+    def finish(self):
+        return self._obj.flush()
+
+    def compress_all(self, body):
+        return self._obj.compress(body) + self._obj.flush()
+
+
+def response_encoding():
+    offered = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_stream(chunks, encoding):
+    compressor = ChunkCompressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+@app.after_request
+def compress_response(response):
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = response_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(ChunkCompressor(encoding).compress_all(body))
+    response.headers["Content-Encoding"] = encoding
+    return response
 
 # ==== Health Endpoint ====
-@app.route("/health", methods=["GET"])
+def wants_verbose_health():
+    return request.args.get("verbose", "").lower() in ("1", "true")
+
+
+@route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "db": config["database"], "type": config["db_type"]})
+    """
+    Liveness for anyone; ?verbose=1 (token required) adds pool, schema,
+    cache and job statistics for every source.
+    """
+    if not wants_verbose_health():
+        return jsonify({"status": "ok"})
+    source = g.source
+    return jsonify({
+        "status": "ok",
+        "source": source.name,
+        "db": source.database,
+        "type": source.db_type,
+        "pool": source.pool.stats(),
+        "schema": source.schema.stats(),
+        "sources": {
+            name: {"db": other.database, "type": other.db_type, "pool": other.pool.stats()}
+            for name, other in sources.items()
+        },
+        "cache": result_cache.stats(),
+        "jobs": job_manager.stats(),
+    })
+
+# ==== Metrics Endpoint ====
+@route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape target; token-protected like every other endpoint but plain /health."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 # ==== Query Execution ====
-@app.route("/query", methods=["POST"])
+def select_response(source, query, data, fmt):
+    timeout_ms = statement_timeout_ms(data)
+    with source.pool.connection() as pc:
+        apply_statement_timeout(pc, timeout_ms)
+        if data.get("page_size") is not None:
+            columns, rows, next_token = fetch_page(pc, query, data)
+            paged = True
+        else:
+            with statement_cursor(pc, query, parse_params(data)) as cursor, timed(source, "fetch"):
+                rows = cursor.fetchall()
+                columns = [desc[0] for desc in cursor.description]
+            paged = False
+    ROWS_RETURNED.inc(len(rows), source=source.name)
+    with timed(source, "serialize"):
+        if paged:
+            return render_page(columns, rows, fmt, next_token)
+        return render_rows(columns, rows, fmt)
+
+
+def cached_select(source, query, data, fmt):
+    if not result_cache.enabled or data.get("cache") is False:
+        return select_response(source, query, data, fmt)
+
+    key = result_cache.key(source, query, fmt, data)
+    response = result_cache.get(key)
+    if response is not None:
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    generation = result_cache.generation
+    response = select_response(source, query, data, fmt)
+    result_cache.put(source, key, response, read_tables(query), generation)
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+
+@route("/query", methods=["POST"])
 def execute_query():
     data = request.get_json()
     query = (data.get("query") or "").strip()
@@ -92,50 +1368,942 @@ def execute_query():
         return jsonify({"error": "Query cannot be empty"}), 400
 
     try:
-        if config["db_type"] == "mysql":
-            conn = mysql.connector.connect(
-                host=config["host"], port=config["port"],
-                user=config["user"], password=config["password"],
-                database=config["database"]
-            )
-            cursor = conn.cursor(dictionary=True)
-        elif config["db_type"] == "postgres":
-            conn = psycopg2.connect(
-                host=config["host"], port=config["port"],
-                user=config["user"], password=config["password"],
-                dbname=config["database"]
-            )
-            cursor = conn.cursor()
-        else:
-            return jsonify({"error": "Unsupported DB type"}), 400
+        fmt = result_format(data)
+        params = parse_params(data)
+        timeout_ms = statement_timeout_ms(data)
+    except (ValueError, InvalidRequest) as e:
+        return jsonify({"error": str(e)}), 400
+
+    is_select = query.lower().startswith("select")
+
+    if is_select and data.get("page_size") is None and wants_stream(data):
+        if fmt == "arrow":
+            return jsonify({"error": "Arrow format cannot be streamed"}), 400
+        try:
+            return stream_query(g.source, query, fmt, params, timeout_ms)
+        except PoolTimeout as e:
+            return jsonify({"error": str(e)}), 503
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    try:
+        if is_select:
+            return cached_select(g.source, query, data, fmt)
+
+        with g.source.pool.connection() as pc:
+            apply_statement_timeout(pc, timeout_ms)
+            with statement_cursor(pc, query, params):
+                pc.conn.commit()
+        invalidate_writes(g.source, [query])
+        return jsonify({"status": "success"})
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except PoolTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ==== Batch Queries ====
+MAX_BATCH_SIZE = env_int("CONNECTOR_MAX_BATCH", 100)
+batch_executor = ThreadPoolExecutor(max_workers=POOL_MAX_SIZE, thread_name_prefix="connector-batch")
 
-        cursor.execute(query)
 
-        if query.lower().startswith("select"):
+def run_statement(pc, query, params=None):
+    """
+    Execute one statement without committing. Returns (columns, rows) when it
+    produced a result set and (None, rowcount) otherwise.
+    """
+    with statement_cursor(pc, query, params) as cursor:
+        if cursor.description is None:
+            return None, cursor.rowcount
+        with timed(pc.source, "fetch"):
             rows = cursor.fetchall()
-            if config["db_type"] == "postgres":
-                columns = [desc[0] for desc in cursor.description]
-                rows = [dict(zip(columns, r)) for r in rows]
-            result = rows
+        ROWS_RETURNED.inc(len(rows), source=pc.source.name)
+        return [desc[0] for desc in cursor.description], rows
+
+
+def shape_result(source, columns, rows, fmt):
+    if columns is None:
+        return {"status": "success", "rowcount": rows}
+    with timed(source, "serialize"):
+        if fmt == "columnar":
+            return encode_columnar(columns, rows)
+        return [dict(zip(columns, r)) for r in rows]
+
+
+def invalidate_writes(source, queries):
+    """Invalidate cached results (and, after DDL, the schema catalog) for committed writes."""
+    if any(DDL_RE.match(query) for query in queries):
+        source.schema.mark_stale()
+    tables = set()
+    for query in queries:
+        touched = written_tables(query)
+        if not touched:
+            result_cache.invalidate(source)
+            return
+        tables |= touched
+    if tables:
+        result_cache.invalidate(source, tables)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def run_batch_item(index, source, query, params, fmt, timeout_ms=0):
+    started = time.perf_counter()
+    try:
+        with source.pool.connection() as pc:
+            apply_statement_timeout(pc, timeout_ms)
+            columns, rows = run_statement(pc, query, params)
+            if columns is None:
+                pc.conn.commit()
+        if columns is None:
+            invalidate_writes(source, [query])
+        return {"index": index, "status": "ok", "result": shape_result(source, columns, rows, fmt),
+                "elapsed_ms": _elapsed_ms(started)}
+    except Exception as e:
+        QUERY_ERRORS.inc(source=source.name)
+        return {"index": index, "status": "error", "error": str(e), "elapsed_ms": _elapsed_ms(started)}
+
+
+def run_batch_transaction(source, queries, params, fmt, timeout_ms=0):
+    """Run statements in order on one connection; the first failure rolls back the rest."""
+    results, writes, failed = [], [], False
+    with source.pool.connection() as pc:
+        apply_statement_timeout(pc, timeout_ms)
+        for index, (query, query_params) in enumerate(zip(queries, params)):
+            if failed:
+                results.append({"index": index, "status": "skipped"})
+                continue
+            started = time.perf_counter()
+            try:
+                columns, rows = run_statement(pc, query, query_params)
+            except Exception as e:
+                failed = True
+                QUERY_ERRORS.inc(source=source.name)
+                results.append({"index": index, "status": "error", "error": str(e),
+                                "elapsed_ms": _elapsed_ms(started)})
+                continue
+            if columns is None:
+                writes.append(query)
+            results.append({"index": index, "status": "ok", "result": shape_result(source, columns, rows, fmt),
+                            "elapsed_ms": _elapsed_ms(started)})
+        if not failed:
+            pc.conn.commit()
+    if not failed:
+        invalidate_writes(source, writes)
+    return results, not failed
+
+
+@route("/query/batch", methods=["POST"])
+def execute_batch():
+    """
+    Run several queries in one round trip. Independent queries run
+    concurrently on separate pooled connections, and each may name its own
+    "source"; with "transaction": true they run in order on a single
+    connection of one source and commit together.
+    """
+    data = request.get_json() or {}
+    items = data.get("queries")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "queries must be a non-empty list"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"A batch can hold at most {MAX_BATCH_SIZE} queries"}), 400
+
+    queries = [((item.get("query") if isinstance(item, dict) else item) or "").strip() for item in items]
+    empty = [i for i, q in enumerate(queries) if not q]
+    if empty:
+        return jsonify({"error": f"Query {empty[0]} cannot be empty"}), 400
+    try:
+        params = [parse_params(item) if isinstance(item, dict) else None for item in items]
+        timeout_ms = statement_timeout_ms(data)
+        item_sources = [
+            get_source(item.get("source")) if isinstance(item, dict) and item.get("source") else g.source
+            for item in items
+        ]
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except UnknownSource as e:
+        return jsonify({"error": str(e)}), 404
+
+    fmt = data.get("format") or "rows"
+    if fmt not in ("rows", "columnar"):
+        return jsonify({"error": "Batch format must be 'rows' or 'columnar'"}), 400
+
+    started = time.perf_counter()
+    try:
+        if data.get("transaction"):
+            if len(set(item_sources)) > 1:
+                return jsonify({"error": "A transaction cannot span data sources"}), 400
+            results, committed = run_batch_transaction(item_sources[0], queries, params, fmt, timeout_ms)
+            body = {"results": results, "committed": committed}
         else:
-            conn.commit()
-            result = {"status": "success"}
+            results = list(batch_executor.map(
+                run_batch_item, range(len(queries)), item_sources, queries, params,
+                [fmt] * len(queries), [timeout_ms] * len(queries),
+            ))
+            body = {"results": results}
+    except PoolTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    body["elapsed_ms"] = _elapsed_ms(started)
+    return jsonify(body)
+
+# ==== Query Jobs ====
+JOB_WORKERS = max(env_int("CONNECTOR_JOB_WORKERS", POOL_MAX_SIZE // 2), 1)   # leaves pool room for /query
+JOB_RETENTION = env_int("CONNECTOR_JOB_RETENTION", 600)                     # seconds a finished job is kept
+MAX_JOBS = env_int("CONNECTOR_MAX_JOBS", 100)
+JOB_FINISHED = ("succeeded", "failed", "timed_out", "cancelled")
+
+
+class QueryJob:
+    def __init__(self, source, query, params, timeout_ms):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.query = query
+        self.params = params
+        self.timeout_ms = timeout_ms
+        self.status = "queued"
+        self.error = None
+        self.columns = None
+        self.rows = None
+        self.rowcount = None
+        self.rows_fetched = 0
+        self.backend_id = None
+        self.cancel_requested = False
+        self.lock = threading.Lock()  # guards backend_id while the session may be cancelled
+        self.future = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "source": self.source.name,
+            "status": self.status,
+            "rows_fetched": self.rows_fetched,
+            "rowcount": self.rowcount,
+            "error": self.error,
+            "timeout_ms": self.timeout_ms,
+            "elapsed_ms": round((end - self.started_at) * 1000, 2) if self.started_at else None,
+            "created_at": self.created_at,
+        }
+
+
+def backend_id(pc):
+    return pc.conn.connection_id if pc.source.db_type == "mysql" else pc.conn.get_backend_pid()
+
 
-        cursor.close()
+def cancel_backend(source, target):
+    """
+    Interrupt the statement running on another session. Uses its own short
+    lived connection so cancelling still works when the pool is exhausted.
+    """
+    conn = source.open_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            if source.db_type == "mysql":
+                cursor.execute("KILL QUERY %s", (int(target),))
+            else:
+                cursor.execute("SELECT pg_cancel_backend(%s)", (int(target),))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+    finally:
         conn.close()
-        return jsonify(result)
 
+
+class JobManager:
+    """Runs submitted queries on a bounded executor and keeps their results for a while."""
+
+    def __init__(self, workers, retention, max_jobs):
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="connector-job")
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        """
+        Drop finished jobs past their retention, then the oldest finished
+        ones until there is room for another job. Queued and running jobs
+        are never dropped.
+        """
+        cutoff = time.time() - self.retention
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in JOB_FINISHED), key=lambda job: job.finished_at
+        )
+        excess = len(self._jobs) - self.max_jobs + 1
+        for job in finished:
+            if job.finished_at >= cutoff and excess <= 0:
+                break
+            del self._jobs[job.id]
+            excess -= 1
+
+    def submit(self, source, query, params, timeout_ms):
+        job = QueryJob(source, query, params, timeout_ms)
+        with self._lock:
+            self._prune()
+            # Only unfinished jobs count: kept results must not lock out new work
+            if sum(other.status not in JOB_FINISHED for other in self._jobs.values()) >= self.max_jobs:
+                raise InvalidRequest(f"Too many jobs in flight (max {self.max_jobs})")
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job):
+        if job.status in JOB_FINISHED:
+            return
+        with job.lock:
+            job.cancel_requested = True
+            if job.future.cancel():
+                self._finish(job, "cancelled")
+            elif job.backend_id is not None:
+                # Holding the lock keeps _run from returning the session to the
+                # pool, where the cancel could hit another request's query.
+                cancel_backend(job.source, job.backend_id)
+
+    def _finish(self, job, status, error=None):
+        with self._lock:
+            job.error = error
+            job.backend_id = None
+            job.finished_at = time.time()
+            # Published last: _prune sorts finished jobs by finished_at
+            job.status = status
+
+    def _run(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            with job.source.pool.connection() as pc:
+                with job.lock:
+                    if job.cancel_requested:
+                        self._finish(job, "cancelled")
+                        return
+                    job.backend_id = backend_id(pc)
+                try:
+                    apply_statement_timeout(pc, job.timeout_ms)
+                    with statement_cursor(pc, job.query, job.params) as cursor:
+                        if cursor.description is None:
+                            job.rowcount = cursor.rowcount
+                            pc.conn.commit()
+                        else:
+                            job.columns = [desc[0] for desc in cursor.description]
+                            rows = []
+                            while True:
+                                with timed(job.source, "fetch"):
+                                    batch = cursor.fetchmany(FETCH_SIZE)
+                                if not batch:
+                                    break
+                                rows.extend(batch)
+                                job.rows_fetched = len(rows)
+                            job.rows = rows
+                finally:
+                    # Forget the session before it goes back to the pool
+                    with job.lock:
+                        job.backend_id = None
+            if job.rows is None:
+                invalidate_writes(job.source, [job.query])
+            self._finish(job, "cancelled" if job.cancel_requested else "succeeded")
+        except Exception as e:
+            if job.cancel_requested:
+                status = "cancelled"
+            elif is_timeout_error(e):
+                status = "timed_out"
+            else:
+                status = "failed"
+            if status != "cancelled":
+                QUERY_ERRORS.inc(source=job.source.name)
+            self._finish(job, status, str(e))
+
+    def stats(self):
+        with self._lock:
+            return dict(collections.Counter(job.status for job in self._jobs.values()))
+
+
+job_manager = JobManager(JOB_WORKERS, JOB_RETENTION, MAX_JOBS)
+
+
+@route("/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json() or {}
+    query = (data.get("query") or "").strip()
+    if not query:
+        return jsonify({"error": "Query cannot be empty"}), 400
+    try:
+        job = job_manager.submit(g.source, query, parse_params(data), statement_timeout_ms(data))
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status not in JOB_FINISHED:
+        return jsonify({"error": "Job has not finished", **job.to_dict()}), 409
+    if job.status != "succeeded":
+        return jsonify(job.to_dict()), 410 if job.status == "cancelled" else 500
+    if job.rows is None:
+        return jsonify({"status": "success", "rowcount": job.rowcount})
+    try:
+        fmt = result_format(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ROWS_RETURNED.inc(len(job.rows), source=job.source.name)
+    with timed(job.source, "serialize"):
+        return render_rows(job.columns, job.rows, fmt)
+
+
+@route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        job_manager.cancel(job)
+    except Exception as e:
+        return jsonify({"error": f"Could not cancel job: {e}"}), 500
+    return jsonify(job.to_dict()), 202
+
+# ==== Bulk Ingestion ====
+INGEST_BATCH_SIZE = env_int("CONNECTOR_INGEST_BATCH", 5000)
+INGEST_COMMIT_EVERY = env_int("CONNECTOR_INGEST_COMMIT_EVERY", 50000)   # rows, 0 commits once at the end
+
+
+def quote_table(name, db_type):
+    if not isinstance(name, str) or not name:
+        raise InvalidRequest("table is required")
+    return ".".join(quote_identifier(part, db_type) for part in name.split("."))
+
+
+def ingest_rows(stream, fmt, columns, header):
+    """
+    Yield (columns, row_iterator) for a CSV or NDJSON request body without
+    reading it all into memory. Empty CSV fields load as NULL.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream), encoding="utf-8", newline="")
+    if fmt == "csv":
+        reader = csv.reader(text)
+        if header:
+            first = next(reader, None)
+            columns = columns or first
+        if not columns:
+            raise InvalidRequest("columns are required for CSV without a header row")
+        return columns, (tuple(None if v == "" else v for v in row) for row in reader if row)
+
+    def objects():
+        for number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                raise InvalidRequest(f"Line {number} is not valid JSON: {e}")
+            if not isinstance(obj, dict):
+                raise InvalidRequest(f"Line {number}: each NDJSON line must be an object")
+            yield obj
+
+    objs = objects()
+    first = next(objs, None)
+    if first is None:
+        return columns or [], iter(())
+    columns = columns or list(first)
+    return columns, (tuple(obj.get(c) for c in columns) for obj in itertools.chain([first], objs))
+
+
+def _copy_field(value):
+    # Quoted fields are never NULL in COPY ... CSV, so "" stays an empty string
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def load_batch(db_type, cursor, table, columns, batch):
+    column_list = ", ".join(quote_identifier(c, db_type) for c in columns)
+    if db_type == "postgres":
+        buffer = io.StringIO("".join(",".join(_copy_field(v) for v in row) + "\n" for row in batch))
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        # mysql.connector rewrites executemany INSERTs into multi-row VALUES
+        values = [
+            tuple(json.dumps(v) if isinstance(v, (dict, list)) else v for v in row) for row in batch
+        ]
+        placeholders = ", ".join(["%s"] * len(columns))
+        cursor.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})", values)
+
+
+@route("/ingest", methods=["POST"])
+def ingest():
+    """
+    Bulk-load a CSV or NDJSON request body into a table: COPY FROM STDIN on
+    Postgres, batched executemany on MySQL. The body is consumed as it
+    arrives, batch_size rows at a time, committing every commit_every rows.
+    """
+    args = request.args
+    fmt = (args.get("format") or ("ndjson" if "json" in (request.mimetype or "") else "csv")).lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+    batch_size = max(args.get("batch_size", INGEST_BATCH_SIZE, type=int), 1)
+    commit_every = max(args.get("commit_every", INGEST_COMMIT_EVERY, type=int), 0)
+    header = args.get("header", "true").lower() != "false"
+    requested_columns = [c for c in (args.get("columns") or "").split(",") if c] or None
+
+    started = time.perf_counter()
+    loaded = committed = batches = commits = 0
+    table_name = args.get("table")
+    source = g.source
+    try:
+        table = quote_table(table_name, source.db_type)
+        columns, rows = ingest_rows(request.stream, fmt, requested_columns, header)
+        for c in columns:
+            quote_identifier(c, source.db_type)
+
+        with source.pool.connection() as pc:
+            cursor = pc.conn.cursor()
+            try:
+                while True:
+                    batch = list(itertools.islice(rows, batch_size))
+                    if not batch:
+                        break
+                    load_batch(source.db_type, cursor, table, columns, batch)
+                    loaded += len(batch)
+                    batches += 1
+                    if commit_every and loaded - committed >= commit_every:
+                        pc.conn.commit()
+                        committed, commits = loaded, commits + 1
+                if loaded > committed:
+                    pc.conn.commit()
+                    committed, commits = loaded, commits + 1
+            finally:
+                cursor.close()
+    except InvalidRequest as e:
+        # Rows before the bad line may already be committed (commit_every)
+        return jsonify({"error": str(e), "rows_committed": committed}), 400
+    except PoolTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e), "rows_committed": committed}), 500
+    finally:
+        if committed:
+            result_cache.invalidate(source, {table_name.split(".")[-1].lower()})
+
+    elapsed = time.perf_counter() - started
+    return jsonify({
+        "table": table_name,
+        "rows": loaded,
+        "batches": batches,
+        "commits": commits,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "rows_per_second": round(loaded / elapsed, 1) if elapsed > 0 else None,
+    })
+
+# ==== Schema Catalog ====
+SCHEMA_REFRESH_INTERVAL = env_int("CONNECTOR_SCHEMA_REFRESH", 300)   # seconds, 0 disables background refresh
+SCHEMA_DETAIL_CHUNK = 500                                              # tables per detail query
+DDL_RE = re.compile(r"\s*(create|alter|drop|rename|comment)\b", re.IGNORECASE)
+
+# One cheap row per table whose signature changes when its columns or indexes do,
+# so only changed tables get their (slower) column and index details re-read.
+PG_TABLE_SIGNATURES = """
+SELECT c.oid, n.nspname, c.relname, c.relkind, GREATEST(c.reltuples, 0)::bigint,
+       md5(concat_ws('|',
+           (SELECT string_agg(a.attname || ':' || a.atttypid || ':' || a.atttypmod || ':' || a.attnotnull,
+                              ',' ORDER BY a.attnum)
+              FROM pg_attribute a
+             WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped),
+           (SELECT string_agg(i.indexrelid::text, ',' ORDER BY i.indexrelid)
+              FROM pg_index i WHERE i.indrelid = c.oid)))
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+"""
+PG_COLUMNS = """
+SELECT a.attrelid, a.attname, format_type(a.atttypid, a.atttypmod), NOT a.attnotnull,
+       pg_get_expr(d.adbin, d.adrelid)
+FROM pg_attribute a
+LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+WHERE a.attrelid = ANY(%s::oid[]) AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attrelid, a.attnum
+"""
+PG_INDEXES = """
+SELECT i.indrelid, ic.relname, i.indisunique, i.indisprimary,
+       ARRAY(SELECT a.attname
+               FROM unnest(i.indkey::int2[]) WITH ORDINALITY k(attnum, ord)
+               JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+              ORDER BY k.ord)
+FROM pg_index i
+JOIN pg_class ic ON ic.oid = i.indexrelid
+WHERE i.indrelid = ANY(%s::oid[])
+ORDER BY i.indrelid, ic.relname
+"""
+PG_RELKINDS = {"r": "table", "p": "table", "v": "view", "m": "materialized view", "f": "foreign table"}
+
+# Columns and indexes are folded in as a count plus an XOR of per-row hashes:
+# GROUP_CONCAT would be cut off at group_concat_max_len (1024 bytes by default)
+# and miss changes to wide tables.
+MYSQL_TABLE_SIGNATURES = """
+SELECT t.table_name, t.table_schema, t.table_name, t.table_type, t.table_rows,
+       MD5(CONCAT_WS('|', t.create_time,
+           (SELECT CONCAT(COUNT(*), ':', BIT_XOR(CAST(CONV(LEFT(MD5(CONCAT_WS(':',
+                       c.ordinal_position, c.column_name, c.column_type, c.is_nullable)), 16), 16, 10) AS UNSIGNED)))
+              FROM information_schema.columns c
+             WHERE c.table_schema = t.table_schema AND c.table_name = t.table_name),
+           (SELECT CONCAT(COUNT(*), ':', BIT_XOR(CAST(CONV(LEFT(MD5(CONCAT_WS(':',
+                       s.index_name, s.seq_in_index, s.column_name, s.non_unique)), 16), 16, 10) AS UNSIGNED)))
+              FROM information_schema.statistics s
+             WHERE s.table_schema = t.table_schema AND s.table_name = t.table_name)))
+FROM information_schema.tables t
+WHERE t.table_schema = DATABASE()
+"""
+MYSQL_COLUMNS = """
+SELECT table_name, column_name, column_type, is_nullable = 'YES', column_default
+FROM information_schema.columns
+WHERE table_schema = DATABASE() AND table_name IN ({names})
+ORDER BY table_name, ordinal_position
+"""
+MYSQL_INDEXES = """
+SELECT table_name, index_name, MIN(non_unique) = 0, index_name = 'PRIMARY',
+       GROUP_CONCAT(column_name ORDER BY seq_in_index)
+FROM information_schema.statistics
+WHERE table_schema = DATABASE() AND table_name IN ({names})
+GROUP BY table_name, index_name
+ORDER BY table_name, index_name
+"""
+
+
+class SchemaCatalog:
+    """
+    Cached table/column/index catalog for /schema. Each refresh reads one
+    signature row per table and re-reads details only for tables whose
+    signature changed. The rendered body and its ETag are kept, so serving
+    an unchanged catalog is a 304 or a plain byte copy.
+    """
+
+    def __init__(self, source, interval):
+        self.source = source
+        self.interval = interval
+        self._tables = {}       # (schema, name) -> table entry
+        self._signatures = {}   # (schema, name) -> signature
+        self._body = None
+        self.etag = None
+        self.refreshed_at = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    def mark_stale(self):
+        self._stale = True
+
+    def _query(self, conn, sql, params=None):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _signatures_of(self, conn):
+        """(schema, name) -> (ident, type, row_estimate, signature)"""
+        if self.source.db_type == "mysql":
+            rows = self._query(conn, MYSQL_TABLE_SIGNATURES)
+            return {
+                (schema, name): (ident, "view" if "VIEW" in kind else "table", rows_, sig)
+                for ident, schema, name, kind, rows_, sig in rows
+            }
+        rows = self._query(conn, PG_TABLE_SIGNATURES)
+        return {
+            (schema, name): (oid, PG_RELKINDS.get(kind, kind), rows_, sig)
+            for oid, schema, name, kind, rows_, sig in rows
+        }
+
+    def _details(self, conn, idents):
+        """ident -> {"columns": [...], "indexes": [...]} for the given tables."""
+        details = {ident: {"columns": [], "indexes": []} for ident in idents}
+        for start in range(0, len(idents), SCHEMA_DETAIL_CHUNK):
+            chunk = idents[start:start + SCHEMA_DETAIL_CHUNK]
+            if self.source.db_type == "mysql":
+                names = ", ".join(["%s"] * len(chunk))
+                columns = self._query(conn, MYSQL_COLUMNS.format(names=names), chunk)
+                indexes = self._query(conn, MYSQL_INDEXES.format(names=names), chunk)
+            else:
+                columns = self._query(conn, PG_COLUMNS, (chunk,))
+                indexes = self._query(conn, PG_INDEXES, (chunk,))
+            for ident, name, data_type, nullable, default in columns:
+                details[ident]["columns"].append({
+                    "name": name, "type": data_type, "nullable": bool(nullable),
+                    "default": None if default is None else str(default),
+                })
+            for ident, name, unique, primary, index_columns in indexes:
+                if isinstance(index_columns, str):
+                    index_columns = index_columns.split(",")
+                details[ident]["indexes"].append({
+                    "name": name, "unique": bool(unique), "primary": bool(primary),
+                    "columns": list(index_columns or []),
+                })
+        return details
+
+    def refresh(self, full=False):
+        """
+        Refresh the catalog; returns how many tables were (re)read. Only tables
+        whose signature changed are re-read unless `full` is set.
+        """
+        with self._refresh_lock:
+            self._stale = False
+            with self.source.pool.connection() as pc:
+                signatures = self._signatures_of(pc.conn)
+                changed = [
+                    key for key, value in signatures.items() if full or self._signatures.get(key) != value[3]
+                ]
+                details = self._details(pc.conn, [signatures[key][0] for key in changed]) if changed else {}
+
+            tables = {}
+            for key, (ident, kind, row_estimate, _) in signatures.items():
+                entry = dict(self._tables.get(key) or {})
+                if ident in details or not entry:
+                    entry.update(details.get(ident, {"columns": [], "indexes": []}))
+                entry.update({"schema": key[0], "name": key[1], "type": kind,
+                              "row_estimate": None if row_estimate is None else int(row_estimate)})
+                tables[key] = entry
+
+            ordered = [tables[key] for key in sorted(tables)]
+            etag = hashlib.sha1(dumps_compact(ordered).encode()).hexdigest()
+            refreshed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            body = dumps_compact({
+                "source": self.source.name, "db": self.source.database, "type": self.source.db_type,
+                "refreshed_at": refreshed_at, "tables": ordered,
+            })
+            with self._lock:
+                self._tables, self._signatures = tables, {k: v[3] for k, v in signatures.items()}
+                if etag != self.etag:
+                    self._body, self.etag = body, etag
+                self.refreshed_at = refreshed_at
+            return len(changed)
+
+    def snapshot(self, force=False):
+        """
+        (etag, body), refreshing first if the catalog was never loaded or is
+        stale. `force` re-reads every table, in case a signature missed a change.
+        """
+        if force or self._stale or self._body is None:
+            self.refresh(full=force)
+        with self._lock:
+            return self.etag, self._body
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Schema refresh failed for '{self.source.name}': {e}")
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        with self._lock:
+            return {"tables": len(self._tables), "etag": self.etag, "refreshed_at": self.refreshed_at}
+
+
+for _source in sources.values():
+    _source.schema = SchemaCatalog(_source, SCHEMA_REFRESH_INTERVAL)
+
+
+@route("/schema", methods=["GET"])
+def schema():
+    """Tables, columns, types, row estimates and indexes, with ETag revalidation."""
+    force = request.args.get("refresh", "").lower() in ("1", "true")
+    try:
+        etag, body = g.source.schema.snapshot(force=force)
+    except PoolTimeout as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
-        try: cursor.close()
-        except: pass
-        try: conn.close()
-        except: pass
         return jsonify({"error": str(e)}), 500
 
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 # ==== Flask Runner ====
 def run_flask():
     app.run(host="0.0.0.0", port=config["local_port"], debug=False, use_reloader=False)
 
+# ==== ASGI Runner ====
+SERVER_MODE = os.getenv("CONNECTOR_SERVER", "asgi").lower()           # asgi | flask
+QUERY_WORKERS = max(env_int("CONNECTOR_WORKERS", POOL_MAX_SIZE * 2 * len(sources)), 1)
+
+
+def is_light_path(path):
+    """Requests that must never be queued behind slow queries."""
+    endpoint = path.rsplit("/", 1)[-1] if path.startswith("/sources/") else path.lstrip("/")
+    return endpoint in ("health", "metrics")
+
+
+class AsgiInput(io.RawIOBase):
+    """wsgi.input that pulls request body chunks from the event loop on demand."""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b""
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                self._more = False
+            else:
+                self._buffer += message.get("body", b"")
+                self._more = message.get("more_body", False)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class AsgiBridge:
+    """
+    Serve the Flask app over ASGI. Every request runs on a bounded thread
+    pool, so the event loop itself never blocks on a database driver and
+    keeps accepting connections; request and response bodies are passed
+    through chunk by chunk. Light endpoints get their own small executor
+    so /health answers even when every query worker is busy.
+    """
+
+    def __init__(self, wsgi_app, workers):
+        self.wsgi_app = wsgi_app
+        self.query_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="connector-query")
+        self.light_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="connector-light")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    self.query_executor.shutdown(wait=False, cancel_futures=True)
+                    self.light_executor.shutdown(wait=False, cancel_futures=True)
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        executor = self.light_executor if is_light_path(scope["path"]) else self.query_executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, self._handle, scope, receive, send, loop)
+
+    @staticmethod
+    def _environ(scope, body):
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+            "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+            "QUERY_STRING": scope["query_string"].decode("latin1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "REMOTE_ADDR": client[0],
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope["headers"]:
+            name = name.decode("latin1")
+            if name == "content-type":
+                key = "CONTENT_TYPE"
+            elif name == "content-length":
+                key = "CONTENT_LENGTH"
+            else:
+                key = "HTTP_" + name.upper().replace("-", "_")
+            value = value.decode("latin1")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _handle(self, scope, receive, send, loop):
+        def call(coro):
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers]
+            return lambda data: None
+
+        environ = self._environ(scope, io.BufferedReader(AsgiInput(receive, loop)))
+        result = self.wsgi_app(environ, start_response)
+        try:
+            call(send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]}))
+            for chunk in result:
+                if chunk:
+                    call(send({"type": "http.response.body", "body": chunk, "more_body": True}))
+            call(send({"type": "http.response.body", "body": b"", "more_body": False}))
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+asgi_app = AsgiBridge(app, QUERY_WORKERS)
+
+
+def run_asgi():
+    server_config = uvicorn.Config(
+        asgi_app, host="0.0.0.0", port=config["local_port"],
+        loop="asyncio", http="h11", ws="none", lifespan="on", log_level="warning",
+    )
+    uvicorn.Server(server_config).run()
+
+
+def run_server():
+    if SERVER_MODE == "asgi" and uvicorn is not None:
+        run_asgi()
+    else:
+        run_flask()
+
 # ==== Ngrok Tunnel ====
 def start_ngrok():
     print("🚀 Starting Flask connector with Ngrok...")
@@ -146,9 +2314,16 @@ def start_ngrok():
     return public_url
 
 if __name__ == "__main__":
-    # Start Flask in a background thread
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
+    for source in sources.values():
+        try:
+            source.pool.warm()
+        except Exception as e:
+            print(f"⚠️ Could not open initial connections for '{source.name}': {e}")
+        source.schema.start()
+
+    # Start the server in a background thread
+    server_thread = threading.Thread(target=run_server, daemon=True)
+    server_thread.start()
 
     # Start ngrok tunnel
     public_url = start_ngrok()
@@ -161,9 +2336,13 @@ if __name__ == "__main__":
                 print("🛑 Shutting down connector and Ngrok tunnel...")
                 ngrok.disconnect(public_url)
                 ngrok.kill()
+                for source in sources.values():
+                    source.pool.close()
                 sys.exit(0)
     except KeyboardInterrupt:
         print("\n🛑 Interrupted. Shutting down connector and Ngrok tunnel...")
         ngrok.disconnect(public_url)
         ngrok.kill()
+        for source in sources.values():
+            source.pool.close()
         sys.exit(0)
@@ -0,0 +1,417 @@
+import csv
+import gzip
+import importlib
+import json
+import os
+import re
+import sqlite3
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault("CONNECTOR_PREPARED_CACHE", "0")  # plain execute() on the SQLite stand-in
+os.environ.setdefault("CONNECTOR_SCHEMA_REFRESH", "0")
+
+# The connector asks for its data sources on import
+_answers = iter(["", "postgres", "", "", "user", "db", "n"])
+with mock.patch("builtins.input", lambda prompt="": next(_answers)), \
+        mock.patch("getpass.getpass", return_value="secret"), \
+        mock.patch("builtins.print"):
+    connector = importlib.import_module("local_db_connector")
+
+
+class SQLiteCursor:
+    """Just enough of a psycopg2 cursor over SQLite: %s placeholders, SET ignored."""
+
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().upper().startswith("SET "):
+            return
+        if params is not None:  # psycopg2 only interpolates, and unescapes %%, when given params
+            sql = re.sub(r"%%|%s", lambda m: "%" if m.group() == "%%" else "?", sql)
+        self._cursor.execute(sql, params or [])
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql.replace("%s", "?"), rows)
+
+    def copy_expert(self, sql, buffer):
+        table, columns = re.match(r"COPY (\S+) \((.*?)\) FROM STDIN", sql).groups()
+        rows = [[None if v == "" else v for v in row] for row in csv.reader(buffer)]
+        placeholders = ", ".join("?" * len(rows[0]))
+        self._cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    closed = 0
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, uri=True, check_same_thread=False)
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.closed = 1
+        self.db.close()
+
+    def get_backend_pid(self):
+        return 1
+
+
+class SQLitePreparedCursor(SQLiteCursor):
+    """Like mysql-connector's prepared cursor: it re-prepares unless handed the same string object."""
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.prepares = 0
+        self._executed = None
+        self._statement = None
+
+    def execute(self, sql, params=None):
+        if sql is not self._executed:
+            self.prepares += 1
+            self._executed = sql
+            self._statement = sql.replace("%s", "?")
+        self._cursor.execute(self._statement, params or [])
+
+
+class SQLiteMySQLConnection(SQLiteConnection):
+    def cursor(self, prepared=False):
+        return SQLitePreparedCursor(self.db) if prepared else SQLiteCursor(self.db)
+
+
+class ConnectorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = f"file:connector-test-{id(self)}?mode=memory&cache=shared"
+        self.keeper = sqlite3.connect(self.path, uri=True)
+        self.keeper.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+        self.keeper.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"n{i}") for i in range(1, 31)])
+        self.keeper.commit()
+
+        patcher = mock.patch.object(connector.psycopg2, "connect", side_effect=lambda **kw: SQLiteConnection(self.path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.keeper.close)
+        for source in connector.sources.values():
+            self.addCleanup(source.pool.close)
+        self.client = connector.app.test_client()
+        self.headers = {"X-API-TOKEN": connector.config["token"]}
+
+
+class PoolTests(unittest.TestCase):
+    def pool(self, **options):
+        return connector.ConnectionPool(mock.Mock, lambda conn: True, **{"max_size": 2, "timeout": 0.05, **options})
+
+    def test_released_connection_is_reused(self):
+        pool = self.pool()
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(second, first)
+        self.assertEqual(pool.stats()["created"], 1)
+        first.conn.rollback.assert_called()
+
+    def test_checkout_waits_then_times_out_when_exhausted(self):
+        pool = self.pool(max_size=1)
+        pool.acquire()
+        with self.assertRaises(connector.PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_connection_that_fails_rollback_is_replaced(self):
+        pool = self.pool()
+        with pool.connection() as first:
+            first.conn.rollback.side_effect = Exception("connection lost")
+        with pool.connection() as second:
+            self.assertIsNot(second, first)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_connection_past_max_age_is_recycled(self):
+        pool = self.pool(max_age=1)
+        with pool.connection() as first:
+            first.created_at -= 2
+        with pool.connection() as second:
+            self.assertIsNot(second, first)
+        first.conn.close.assert_called()
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+
+class PageTokenTests(ConnectorTestCase):
+    def page(self, params, token=None):
+        body = {
+            "query": "select * from t where id > %s",
+            "params": params,
+            "page_size": 5,
+            "order_by": ["id"],
+            "cache": False,
+        }
+        if token:
+            body["page_token"] = token
+        return self.client.post("/query", json=body, headers=self.headers)
+
+    def test_token_resumes_same_query(self):
+        token = self.page([15]).get_json()["next_page_token"]
+        response = self.page([15], token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.get_json()["rows"]], [21, 22, 23, 24, 25])
+
+    def test_token_rejected_for_different_params(self):
+        token = self.page([15]).get_json()["next_page_token"]
+        response = self.page([3], token)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("does not belong", response.get_json()["error"])
+
+    def test_literal_percent_survives_later_pages(self):
+        body = {"query": "select id from t where id % 3 = 0", "page_size": 5, "order_by": ["id"], "cache": False}
+        first = self.client.post("/query", json=body, headers=self.headers).get_json()
+        body["page_token"] = first["next_page_token"]
+        response = self.client.post("/query", json=body, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.get_json()["rows"]], [18, 21, 24, 27, 30])
+
+
+class ResultCacheTests(ConnectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(connector.result_cache.invalidate, next(iter(connector.sources.values())))
+
+    def query(self, query):
+        return self.client.post("/query", json={"query": query}, headers=self.headers)
+
+    def test_repeated_select_is_served_from_cache(self):
+        self.assertEqual(self.query("select count(*) as n from t").headers["X-Cache"], "MISS")
+        response = self.query("select count(*) as n from t")
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertEqual(response.get_json(), [{"n": 30}])
+
+    def test_write_invalidates_results_reading_its_table(self):
+        self.query("select count(*) as n from t")
+        self.assertEqual(self.query("insert into t (id, name) values (100, 'x')").status_code, 200)
+        response = self.query("select count(*) as n from t")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(response.get_json(), [{"n": 31}])
+
+
+class BatchTests(ConnectorTestCase):
+    def batch(self, queries, **options):
+        return self.client.post("/query/batch", json={"queries": queries, **options}, headers=self.headers)
+
+    def test_independent_queries_keep_their_order(self):
+        queries = [
+            "select name from t where id = 1",
+            {"query": "select name from t where id = %s", "params": [2]},
+            "select * from missing",
+        ]
+        response = self.batch(queries)
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual([r["status"] for r in results], ["ok", "ok", "error"])
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[1]["result"], [{"name": "n2"}])
+
+    def test_failed_transaction_rolls_back_and_skips_the_rest(self):
+        response = self.batch(
+            ["insert into t (id, name) values (100, 'x')", "select * from missing", "select 1"], transaction=True
+        )
+        body = response.get_json()
+        self.assertFalse(body["committed"])
+        self.assertEqual([r["status"] for r in body["results"]], ["ok", "error", "skipped"])
+        self.assertEqual(self.keeper.execute("SELECT count(*) FROM t").fetchone()[0], 30)
+
+
+class CompressionTests(ConnectorTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(connector, "COMPRESS_MIN_SIZE", 256)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def query(self, encoding, **body):
+        headers = {**self.headers, "Accept-Encoding": encoding}
+        return self.client.post("/query", json={"query": "select * from t", "cache": False, **body}, headers=headers)
+
+    def test_buffered_response_is_gzipped(self):
+        response = self.query("gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.get_data()))), 30)
+
+    def test_streamed_chunks_decompress_to_the_rows(self):
+        response = self.query("gzip", stream=True)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(len(gzip.decompress(response.get_data()).splitlines()), 30)
+
+    def test_small_bodies_and_identity_are_left_alone(self):
+        self.assertNotIn("Content-Encoding", self.query("identity").headers)
+        response = self.query("gzip", query="select name from t where id = 1")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+
+class MySQLPreparedTests(ConnectorTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(connector, "PREPARED_CACHE_SIZE", 8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        source = types.SimpleNamespace(name="mysql-test", db_type="mysql")
+        self.pc = connector.PooledConnection(SQLiteMySQLConnection(self.path), source)
+        self.addCleanup(self.pc.conn.close)
+
+    def test_equal_query_strings_reuse_the_prepared_statement(self):
+        for _ in range(3):
+            query = "".join(["select name from t ", "where id = %s"])  # a new but equal string each time
+            with connector.statement_cursor(self.pc, query, [7]) as cursor:
+                self.assertEqual(cursor.fetchall(), [("n7",)])
+        self.assertEqual(len(self.pc.statements), 1)
+        self.assertEqual(cursor.prepares, 1)
+
+    def test_literal_percent_survives_later_pages(self):
+        data = {"page_size": 5, "order_by": ["id"]}
+        _, _, token = connector.fetch_page(self.pc, "select id from t where id % 3 = 0", data)
+        _, rows, _ = connector.fetch_page(self.pc, "select id from t where id % 3 = 0", {**data, "page_token": token})
+        self.assertEqual([row[0] for row in rows], [18, 21, 24, 27, 30])
+
+
+class IngestTests(ConnectorTestCase):
+    def ingest(self, body, **params):
+        query = "&".join(f"{k}={v}" for k, v in {"table": "t", **params}.items())
+        return self.client.post(
+            f"/ingest?{query}", data=body, headers={**self.headers, "Content-Type": "application/x-ndjson"}
+        )
+
+    def count(self):
+        return self.keeper.execute("SELECT count(*) FROM t").fetchone()[0]
+
+    def test_loads_ndjson(self):
+        response = self.ingest(b'{"id": 100, "name": "a"}\n\n{"id": 101, "name": "b"}\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["rows"], 2)
+        self.assertEqual(self.count(), 32)
+
+    def test_bad_line_after_first_is_a_client_error(self):
+        response = self.ingest(b'{"id": 100, "name": "a"}\n{"id": 101, "name": \n{"id": 102}\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Line 2", response.get_json()["error"])
+        self.assertEqual(self.count(), 30)
+
+    def test_rows_committed_before_a_bad_line_are_reported(self):
+        body = b'{"id": 100}\n{"id": 101}\n[1, 2]\n'
+        response = self.ingest(body, batch_size=1, commit_every=1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Line 3", response.get_json()["error"])
+        self.assertEqual(response.get_json()["rows_committed"], 2)
+
+
+class JobTests(ConnectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = next(iter(connector.sources.values()))
+        self.jobs = connector.JobManager(workers=1, retention=600, max_jobs=2)
+        self.addCleanup(self.jobs._executor.shutdown)
+
+    def run_job(self, query="select count(*) from t"):
+        job = self.jobs.submit(self.source, query, None, 0)
+        job.future.result()
+        return job
+
+    def test_finished_jobs_do_not_count_against_the_limit(self):
+        first, second = self.run_job(), self.run_job()
+        third = self.run_job()
+        self.assertEqual(third.status, "succeeded")
+        self.assertIsNone(self.jobs.get(first.id))
+        self.assertIs(self.jobs.get(second.id), second)
+
+    def test_unfinished_jobs_are_limited(self):
+        for _ in range(2):  # queued, never picked up
+            job = connector.QueryJob(self.source, "select 1", None, 0)
+            self.jobs._jobs[job.id] = job
+        with self.assertRaises(connector.InvalidRequest):
+            self.jobs.submit(self.source, "select 1", None, 0)
+
+
+class SchemaTests(ConnectorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = connector.SchemaCatalog(next(iter(connector.sources.values())), 0)
+        signatures = {("public", "t"): (1, "table", 30, "sig")}
+        details = {1: {"columns": [{"name": "id"}], "indexes": []}}
+        for name, value in (("_signatures_of", signatures), ("_details", details)):
+            patcher = mock.patch.object(self.catalog, name, return_value=value)
+            setattr(self, name.strip("_"), patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_unchanged_signatures_skip_details(self):
+        self.catalog.snapshot()
+        self.catalog.mark_stale()
+        self.catalog.snapshot()
+        self.assertEqual(self.details.call_count, 1)
+
+    def test_forced_refresh_rereads_every_table(self):
+        self.catalog.snapshot()
+        self.catalog.snapshot(force=True)
+        self.assertEqual(self.details.call_count, 2)
+        self.assertEqual(self.details.call_args.args[1], [1])
+
+
+class MetricsTests(ConnectorTestCase):
+    def in_flight(self):
+        return sum(value for _, _, value in connector.IN_FLIGHT.samples())
+
+    def test_streamed_response_is_in_flight_until_closed(self):
+        before = self.in_flight()
+        response = self.client.post(
+            "/query", json={"query": "select * from t", "stream": True}, headers=self.headers, buffered=False
+        )
+        self.assertEqual(self.in_flight(), before + 1)
+        self.assertEqual(len(response.get_data().splitlines()), 30)
+        response.close()
+        self.assertEqual(self.in_flight(), before)
+
+
+class HealthTests(ConnectorTestCase):
+    def test_anonymous_health_is_liveness_only(self):
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"status": "ok"})
+
+    def test_verbose_health_requires_token(self):
+        self.assertEqual(self.client.get("/health?verbose=1").status_code, 401)
+        response = self.client.get("/health?verbose=1", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("pool", response.get_json())
+
+
+if __name__ == "__main__":
+    unittest.main()
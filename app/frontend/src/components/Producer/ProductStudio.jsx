@@ -76,8 +76,18 @@ export default function ProductStudio() {
   useEffect(() => {
     const fetchConnections = async () => {
       try {
-        const res = await AxiosInstance.get("/api/product/source/connections/");
-        if (res.status === 200) setExistingConnections(res.data);
+        // The list is paginated; follow the cursors to collect every page. Only the
+        // cursor is taken from `next`: its absolute URL says http behind the TLS proxy.
+        const connections = [];
+        let cursor = null;
+        do {
+          const res = await AxiosInstance.get("/api/product/source/connections/", {
+            params: cursor ? { cursor } : {},
+          });
+          connections.push(...res.data.results);
+          cursor = res.data.next ? new URL(res.data.next).searchParams.get("cursor") : null;
+        } while (cursor);
+        setExistingConnections(connections);
       } catch (err) {
         console.error("Failed to fetch connections:", err);
       }